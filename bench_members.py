@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Member Store Memory Benchmark
+Compares holding raw member dicts from Discord against dev.MemberStore
+
+    python bench_members.py --members 100000
+"""
+
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+
+from dev import MemberStore
+from mock_discord import make_members, make_roles
+
+def measure(build):
+    """Return (result, bytes allocated, seconds) for build()"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare member storage memory use')
+    parser.add_argument('--members', type=int, default=100000)
+    args = parser.parse_args()
+
+    roles = make_roles()
+    # Round-trip through JSON so the dicts look like decoded API responses
+    payload = json.dumps(make_members(args.members, roles))
+
+    dicts, dict_bytes, dict_time = measure(lambda: json.loads(payload))
+
+    def build_store():
+        store = MemberStore()
+        store.set_roles(roles)
+        generation = store.begin_sync()
+        for member in dicts:
+            store.upsert(member)
+        store.end_sync(generation)
+        return store
+
+    store, store_bytes, store_time = measure(build_store)
+
+    print(f"members:        {args.members:,}")
+    print(f"list of dicts:  {dict_bytes / 2 ** 20:8.1f} MiB  ({dict_bytes / args.members:.0f} B/member, decode {dict_time:.2f}s)")
+    print(f"MemberStore:    {store_bytes / 2 ** 20:8.1f} MiB  ({store_bytes / args.members:.0f} B/member, load {store_time:.2f}s)")
+    print(f"ratio:          {dict_bytes / store_bytes:8.1f}x smaller")
+    print(f"staff indexed:  {len(store.staff)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Server Load Benchmark
+Runs the dev.py app against mock_discord.py and drives every route over HTTP,
+first on a cold cache right after startup, then warm; results are saved as JSON
+
+    python bench_server.py --concurrency 50 --requests 500 --latency 0.05 --global-429-rate 0.02
+    python bench_server.py --output before.json
+    python bench_server.py --output after.json --compare before.json
+
+The app runs in a temporary copy of the site, so uploads, the upload catalog,
+cache snapshots and join logs never touch the working tree. Client, server and
+mock share one process and event loop: compare results from the same machine.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from typing import Dict, List, Optional
+
+import aiohttp
+from aiohttp import web
+
+import mock_discord
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SITE_IGNORE = shutil.ignore_patterns('.git', '__pycache__', 'uploads', '*.jsonl', '*.sqlite3*', 'cache_snapshot.json', 'bench_*.json')
+
+# Cache-backed routes, hit all at once right after startup for the cold run
+CACHED_ROUTES = ['/api/invite', '/api/channels', '/api/moderators', '/api/gallery', '/api/jenna']
+
+def route_specs(setup: Dict) -> List[Dict]:
+    """Every route with a request that exercises it; ok lists the expected statuses
+
+    setup holds what prepare_routes made for the routes that need existing data.
+    """
+    specs = [{'name': f'GET {path}', 'method': 'GET', 'path': path} for path in CACHED_ROUTES]
+    specs += [
+        {'name': 'GET /api/join/stats', 'method': 'GET', 'path': '/api/join/stats'},
+        {'name': 'POST /api/join', 'method': 'POST', 'path': '/api/join', 'headers': {'Referer': 'http://localhost/index.html'}},
+        {'name': 'GET /index.html', 'method': 'GET', 'path': '/index.html'},
+        {'name': 'GET /style.css', 'method': 'GET', 'path': '/style.css'},
+        {'name': 'GET /script.js', 'method': 'GET', 'path': '/script.js'},
+        {'name': 'GET /script.js (304)', 'method': 'GET', 'path': '/script.js', 'conditional': True, 'ok': (304,)},
+        {'name': 'GET large image (sendfile)', 'method': 'GET', 'path': '/SPOILER_IMG_2086.jpg'},
+        {'name': 'GET large image (range)', 'method': 'GET', 'path': '/SPOILER_IMG_2086.jpg', 'headers': {'Range': 'bytes=0-65535'}, 'ok': (206,)},
+        {'name': 'GET /api/site', 'method': 'GET', 'path': '/api/site'},
+        # Time to the first event; the stream itself stays open until the client leaves
+        {'name': 'GET /api/stream (first event)', 'method': 'GET', 'path': '/api/stream', 'first_event': True},
+        {'name': 'GET /metrics', 'method': 'GET', 'path': '/metrics'},
+        {'name': 'GET /api/admin/uploads', 'method': 'GET', 'path': '/api/admin/uploads'},
+        {'name': 'GET /api/admin/uploads?status=pending', 'method': 'GET', 'path': '/api/admin/uploads?status=pending&limit=20'},
+        {'name': 'GET /api/admin/ratelimits', 'method': 'GET', 'path': '/api/admin/ratelimits'},
+        {'name': 'GET /api/admin/jobs', 'method': 'GET', 'path': '/api/admin/jobs'},
+        # Before the collect spec below, whose jobs would push this one out of the history
+        {'name': 'GET /api/admin/jobs/{id}', 'method': 'GET', 'path': f"/api/admin/jobs/{setup['job_id']}"},
+        {'name': 'POST /api/admin/channels', 'method': 'POST', 'path': '/api/admin/channels',
+         'json': {'action': 'add', 'channel': {'name': '#bench', 'desc': 'benchmark'}}},
+        {'name': 'POST /api/admin/set_asset', 'method': 'POST', 'path': '/api/admin/set_asset',
+         'json': {'type': 'banner', 'url': '/assets/server_banner.gif'}},
+        {'name': 'POST /api/admin/add_jenna', 'method': 'POST', 'path': '/api/admin/add_jenna',
+         'json': {'filename': setup['approved']}},
+        # Jobs are queued, or refused with 503 once the queue is full
+        {'name': 'POST /api/admin/collect_jenna_images', 'method': 'POST', 'path': '/api/admin/collect_jenna_images',
+         'json': {}, 'ok': (202, 503)},
+    ]
+    return specs
+
+def make_png(width: int, height: int, seed: int) -> bytes:
+    """A valid PNG of random pixels; random data does not compress, so size ~ width*height*3"""
+    rng = random.Random(seed)
+    raw = b''.join(b'\x00' + rng.getrandbits(width * 24).to_bytes(width * 3, 'little') for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(raw, 1)) + chunk(b'IEND', b'')
+
+def percentile(values: List[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, int(round(p / 100 * len(values) + 0.5)) - 1))]
+
+def summarize(latencies: List[float], errors: int, elapsed: float, nbytes: int) -> Dict:
+    latencies = sorted(latencies)
+    total = len(latencies) + errors
+    result = {
+        'requests': total,
+        'errors': errors,
+        'rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0
+    }
+    result['mb_per_s'] = round(nbytes / elapsed / 2 ** 20, 2) if elapsed else 0.0
+    return result
+
+async def drive(session: aiohttp.ClientSession, base: str, spec: Dict, total: int, concurrency: int,
+                request_kwargs=None) -> Dict:
+    """Send total requests for one route from concurrency workers"""
+    ok = spec.get('ok', (200,))
+    headers = dict(spec.get('headers', {}))
+    if spec.get('conditional'):
+        async with session.get(base + spec['path']) as resp:
+            await resp.read()
+            headers['If-None-Match'] = resp.headers.get('ETag', '')
+
+    latencies: List[float] = []
+    errors = 0
+    sent = 0
+    nbytes = 0
+
+    async def worker():
+        nonlocal errors, sent, nbytes
+        while sent < total:
+            i = sent
+            sent += 1
+            kwargs = request_kwargs(i) if request_kwargs else {'json': spec['json']} if 'json' in spec else {}
+            started = time.perf_counter()
+            try:
+                async with session.request(spec['method'], base + spec['path'], headers=headers, **kwargs) as resp:
+                    if spec.get('first_event'):
+                        async for line in resp.content:
+                            nbytes += len(line)
+                            if line == b'\n':
+                                break
+                    else:
+                        nbytes += len(await resp.read())
+                    if resp.status not in ok:
+                        errors += 1
+                        continue
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, total))))
+    return summarize(latencies, errors, time.perf_counter() - started, nbytes)
+
+async def prepare_routes(session: aiohttp.ClientSession, base: str) -> Dict:
+    """Upload and approve an image and start a job, so routes that need them are measured on their success path"""
+    form = aiohttp.FormData()
+    form.add_field('uploader', 'bench')
+    form.add_field('image', make_png(32, 32, -1), filename='bench.png', content_type='image/png')
+    async with session.post(f'{base}/api/upload', data=form) as resp:
+        resp.raise_for_status()
+        filename = (await resp.json())['filename']
+    async with session.post(f'{base}/api/admin/approve', json={'id': filename}) as resp:
+        resp.raise_for_status()
+    async with session.post(f'{base}/api/admin/collect_jenna_images', json={}) as resp:
+        resp.raise_for_status()
+        job_id = (await resp.json())['job_id']
+    return {'approved': filename, 'job_id': job_id}
+
+async def pending_ids(session: aiohttp.ClientSession, base: str) -> List[str]:
+    """Every pending upload, oldest first"""
+    ids: List[str] = []
+    cursor = ''
+    while True:
+        async with session.get(f'{base}/api/admin/uploads', params={'status': 'pending', 'limit': 100, 'cursor': cursor}) as resp:
+            page = await resp.json()
+        ids += [item['id'] for item in page['items']]
+        cursor = page['next_cursor']
+        if not cursor:
+            return ids
+
+async def mock_stats(session: aiohttp.ClientSession, mock_base: str) -> Dict:
+    async with session.get(f'{mock_base}/_mock/stats') as resp:
+        return await resp.json()
+
+def stats_delta(before: Dict, after: Dict) -> Dict:
+    return {
+        'upstream_requests': after['requests'] - before['requests'],
+        'upstream_429s': after['rate_limited'] - before['rate_limited']
+    }
+
+async def run(args) -> Dict:
+    # Mock Discord first, so dev.py reads its URL from the environment on import
+    mock_runner = web.AppRunner(mock_discord.create_app(
+        args.members, args.latency, args.rate_limit, args.window, args.global_429_rate
+    ), access_log=None)
+    await mock_runner.setup()
+    await web.TCPSite(mock_runner, '127.0.0.1', 0).start()
+    mock_base = 'http://127.0.0.1:%d' % mock_runner.addresses[0][1]
+    os.environ['DISCORD_API'] = f'{mock_base}/api/v10'
+    os.environ.setdefault('GUILD_ID', mock_discord.MOCK_GUILD_ID)
+
+    import dev
+    if not args.verbose:
+        dev.logger.setLevel('ERROR')
+
+    results: Dict = {}
+    # Workers bound concurrency; an unlimited pool keeps routes from queueing behind each other
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        before = await mock_stats(session, mock_base)
+        app = await dev.init_app()
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', 0).start()
+        base = 'http://127.0.0.1:%d' % runner.addresses[0][1]
+
+        # Cold: every cache-backed route at once while the first fills are in flight
+        specs = [{'name': f'GET {path}', 'method': 'GET', 'path': path} for path in CACHED_ROUTES]
+        cold = await asyncio.gather(*(drive(session, base, spec, args.cold_requests, args.concurrency) for spec in specs))
+        results['cold'] = {spec['name']: result for spec, result in zip(specs, cold)}
+        results['cold_upstream'] = stats_delta(before, await mock_stats(session, mock_base))
+
+        # Warm: wait for every key to be filled, then each route on its own
+        deadline = time.monotonic() + 30
+        while any(entry['data'] is None for entry in dev.cache.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        setup = await prepare_routes(session, base)
+        before = await mock_stats(session, mock_base)
+        results['warm'] = {}
+        for spec in route_specs(setup):
+            results['warm'][spec['name']] = await drive(session, base, spec, args.requests, args.concurrency)
+            print(f"  {spec['name']:<42} {results['warm'][spec['name']]['rps']:>9.1f} req/s", file=sys.stderr)
+        results['warm_upstream'] = stats_delta(before, await mock_stats(session, mock_base))
+
+        # Uploads, then moderating them
+        side = max(16, int((args.upload_size / 3) ** 0.5))
+        images = [make_png(side, side, i) for i in range(args.uploads)]
+
+        def upload_form(image: bytes, i: int) -> aiohttp.FormData:
+            form = aiohttp.FormData()
+            form.add_field('uploader', 'bench')
+            form.add_field('image', image, filename=f'bench{i}.png', content_type='image/png')
+            return form
+
+        def upload_kwargs(i: int) -> Dict:
+            return {'data': upload_form(images[i], i)}
+
+        upload_spec = {'name': 'POST /api/upload', 'method': 'POST', 'path': '/api/upload'}
+        upload = await drive(session, base, upload_spec, args.uploads, args.concurrency, upload_kwargs)
+        upload['mb_per_s'] = round(upload['rps'] * len(images[0]) / 2 ** 20, 2)  # bytes sent, not received
+        results['uploads'] = {upload_spec['name']: upload}
+
+        uploaded = await pending_ids(session, base)
+        half = len(uploaded) // 2
+        for name, path, ids in (('POST /api/admin/approve', '/api/admin/approve', uploaded[:half]),
+                                ('POST /api/admin/reject', '/api/admin/reject', uploaded[half:])):
+            if ids:
+                spec = {'name': name, 'method': 'POST', 'path': path}
+                results['uploads'][name] = await drive(session, base, spec, len(ids), args.concurrency,
+                                                       lambda i, ids=ids: {'json': {'id': ids[i]}})
+
+        # Batch moderation: many small uploads, then approved or rejected args.batch_size at a time
+        small = [make_png(16, 16, args.uploads + i) for i in range(args.batch_uploads)]
+        small_spec = {'name': 'POST /api/upload (small)', 'method': 'POST', 'path': '/api/upload'}
+        await drive(session, base, small_spec, len(small), args.concurrency, lambda i: {'data': upload_form(small[i], i)})
+        uploaded = await pending_ids(session, base)
+        half = len(uploaded) // 2
+        for name, path, ids in (('POST /api/admin/reject_batch', '/api/admin/reject_batch', uploaded[:half]),
+                                ('POST /api/admin/approve_batch', '/api/admin/approve_batch', uploaded[half:])):
+            batches = [ids[i:i + args.batch_size] for i in range(0, len(ids), args.batch_size)]
+            if batches:
+                spec = {'name': name, 'method': 'POST', 'path': path}
+                results['uploads'][name] = await drive(session, base, spec, len(batches), args.concurrency,
+                                                       lambda i, batches=batches: {'json': {'ids': batches[i]}})
+
+    await runner.cleanup()
+    await mock_runner.cleanup()
+    return results
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_results(results: Dict):
+    for phase in ('cold', 'warm', 'uploads'):
+        print(f"\n{phase}")
+        print(f"  {'route':<42} {'req/s':>9} {'MB/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for name, r in results[phase].items():
+            print(f"  {name:<42} {r['rps']:>9.1f} {r['mb_per_s']:>8.2f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['errors']:>7}")
+        upstream = results.get(f'{phase}_upstream')
+        if upstream:
+            print(f"  upstream: {upstream['upstream_requests']} Discord calls, {upstream['upstream_429s']} rate limited")
+
+def print_comparison(results: Dict, baseline: Dict):
+    print(f"\nchange vs {baseline['meta'].get('revision') or 'baseline'} (p50 / p99 / req/s)")
+    for phase in ('cold', 'warm', 'uploads'):
+        for name, r in results[phase].items():
+            old = baseline.get('results', {}).get(phase, {}).get(name)
+            if not old:
+                continue
+            def change(key):
+                return f"{(r[key] - old[key]) / old[key] * 100:+.0f}%" if old[key] else 'n/a'
+            print(f"  {phase:<7} {name:<42} {change('p50_ms'):>6} {change('p99_ms'):>6} {change('rps'):>6}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test dev.py against a mock Discord API')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=300, help='requests per route in the warm run')
+    parser.add_argument('--cold-requests', type=int, default=100, help='requests per cache-backed route right after startup')
+    parser.add_argument('--uploads', type=int, default=50)
+    parser.add_argument('--upload-size', type=int, default=256 * 1024, help='approximate bytes per uploaded image')
+    parser.add_argument('--batch-uploads', type=int, default=400, help='small uploads moderated through the batch endpoints')
+    parser.add_argument('--batch-size', type=int, default=50, help='ids per batch approve or reject request')
+    parser.add_argument('--members', type=int, default=2500, help='mock guild member count')
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds the mock adds to every Discord call')
+    parser.add_argument('--rate-limit', type=int, default=0, help='mock requests per route per window (0 = unlimited)')
+    parser.add_argument('--window', type=float, default=1.0)
+    parser.add_argument('--global-429-rate', type=float, default=0.0, help='fraction of Discord calls answered with a global 429')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--verbose', action='store_true', help='keep dev.py logging')
+    args = parser.parse_args()
+
+    output = os.path.abspath(args.output)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    # Run the app from a throwaway copy of the site
+    workdir = tempfile.mkdtemp(prefix='bench-site-')
+    try:
+        site = os.path.join(workdir, 'site')
+        shutil.copytree(REPO_DIR, site, ignore=SITE_IGNORE)
+        os.chdir(site)
+        for name in ('UPLOAD_CATALOG', 'CACHE_SNAPSHOT', 'JOIN_LOG'):
+            os.environ.pop(name, None)
+        sys.path.insert(0, site)
+        results = asyncio.run(run(args))
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'aiohttp': aiohttp.__version__,
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': {k: v for k, v in vars(args).items() if k not in ('output', 'compare', 'verbose')}
+        },
+        'results': results
+    }
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    print_results(results)
+    if baseline:
+        print_comparison(results, baseline)
+    print(f"\nsaved {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Static Asset Build
+Minifies and content-hashes the site's CSS and JavaScript, points the HTML pages
+at the hashed names and writes gzip and brotli copies of every text file
+
+    python build_static.py                  # writes dist/
+    STATIC_BUILD_DIR=dist python dev.py     # serves dist/ ahead of the source files
+
+A hashed file's name changes with its content, so dev.py serves those with
+Cache-Control: immutable. The HTML keeps its names and is revalidated instead.
+dist/manifest.json lists the hashed names and the encodings written for each file.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from typing import Dict, List, Optional
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz copies are written then
+    brotli = None
+
+HASHED_EXTENSIONS = ('.css', '.js', '.svg')  # top-level files renamed by content
+COMPRESSED_EXTENSIONS = ('.html', '.css', '.js', '.svg')
+COMPRESS_MIN_SIZE = 256  # smaller files gain nothing from compression
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+MANIFEST = 'manifest.json'
+
+CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/|\s+', re.S)
+CSS_PUNCTUATION = set('{};,:>')  # a space after any of these can go
+CSS_BEFORE = set('{};,>')  # and before these; not ':', as in "a :hover"
+
+def minify_css(text: str) -> str:
+    """Drop comments and the whitespace CSS does not need; strings are left alone"""
+    tokens: List[Optional[str]] = []  # None marks whitespace
+    pos = 0
+    for match in CSS_TOKENS.finditer(text):
+        tokens.append(text[pos:match.start()])
+        pos = match.end()
+        if match.group(1):
+            tokens.append(match.group(1))
+        elif not match.group().startswith('/*'):
+            tokens.append(None)
+    tokens.append(text[pos:])
+    tokens = [token for token in tokens if token != '']
+
+    # Whitespace next to punctuation goes; a space elsewhere may separate selectors or values
+    out: List[str] = []
+    for i, token in enumerate(tokens):
+        if token is None:
+            after = next((t for t in tokens[i + 1:i + 4] if t is not None), '')
+            if out and after and out[-1][-1] not in CSS_PUNCTUATION | {' '} and after[0] not in CSS_BEFORE:
+                out.append(' ')
+            continue
+        if token[0] == '}' and out and out[-1] == ';':
+            out.pop()
+        if token[0] in '"\'':
+            out.append(token)
+        else:
+            out.extend(token.replace(';}', '}'))
+    return ''.join(out)
+
+def minify_js(text: str) -> str:
+    """Strip indentation, blank lines and whole-line comments
+
+    Line breaks are kept, so automatic semicolon insertion sees the same code.
+    Template literals spanning lines would be changed, so they are refused.
+    """
+    lines = []
+    for line in text.splitlines():
+        if line.count('`') % 2:
+            raise ValueError('multi-line template literals are not supported by the JS minifier')
+        stripped = line.strip()
+        if not stripped or stripped.startswith('//') or (stripped.startswith('/*') and stripped.endswith('*/')):
+            continue
+        lines.append(stripped)
+    return '\n'.join(lines) + '\n'
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+def hashed_name(name: str, body: bytes) -> str:
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.blake2b(body, digest_size=6).hexdigest()}{ext}'
+
+def rewrite_html(html: str, assets: Dict[str, str]) -> str:
+    """Point href and src attributes naming a hashed file at its hashed name"""
+    def replace(match):
+        attr, quote, slash, name = match.groups()
+        if name not in assets:
+            return match.group()
+        return f'{attr}={quote}{slash}{assets[name]}{quote}'
+    return re.sub(r'\b(href|src)=(["\'])(/?)([^"\'?#]+)\2', replace, html)
+
+def write_compressed(path: str, body: bytes) -> List[str]:
+    """Write .gz (and .br) next to path when they are smaller; the encodings written"""
+    encodings = []
+    if len(body) < COMPRESS_MIN_SIZE:
+        return encodings
+    variants = {'gzip': gzip.compress(body, 9, mtime=0)}
+    if brotli:
+        variants['br'] = brotli.compress(body, quality=11)
+    for encoding, compressed in variants.items():
+        if len(compressed) < len(body):
+            with open(path + ENCODING_SUFFIXES[encoding], 'wb') as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return sorted(encodings)
+
+def build(source: str, out: str) -> Dict:
+    """Build into a fresh directory, then swap it in for out"""
+    staging = out.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(staging, ignore_errors=True)
+    os.makedirs(staging)
+
+    assets = {}
+    outputs = {}
+    for name in sorted(os.listdir(source)):
+        path = os.path.join(source, name)
+        if not os.path.isfile(path) or not name.endswith(HASHED_EXTENSIONS):
+            continue
+        with open(path, 'rb') as f:
+            body = f.read()
+        minify = MINIFIERS.get(os.path.splitext(name)[1])
+        if minify:
+            body = minify(body.decode('utf-8')).encode('utf-8')
+        assets[name] = hashed_name(name, body)
+        outputs[assets[name]] = body
+
+    for name in sorted(os.listdir(source)):
+        path = os.path.join(source, name)
+        if os.path.isfile(path) and name.endswith('.html'):
+            with open(path, encoding='utf-8') as f:
+                outputs[name] = rewrite_html(f.read(), assets).encode('utf-8')
+
+    files = {}
+    for name, body in outputs.items():
+        path = os.path.join(staging, name)
+        with open(path, 'wb') as f:
+            f.write(body)
+        files[name] = write_compressed(path, body) if name.endswith(COMPRESSED_EXTENSIONS) else []
+
+    manifest = {'assets': assets, 'files': files}
+    with open(os.path.join(staging, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Refuse to replace a directory this script did not make
+    if os.path.isdir(out) and os.listdir(out) and not os.path.exists(os.path.join(out, MANIFEST)):
+        shutil.rmtree(staging)
+        raise SystemExit(f'{out} exists and is not a static build; choose another --out')
+    retired = out.rstrip(os.sep) + '.old'
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.isdir(out):
+        os.rename(out, retired)
+    os.rename(staging, out)
+    shutil.rmtree(retired, ignore_errors=True)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description='Build hashed, minified and precompressed static assets')
+    parser.add_argument('--source', default='.', help='directory with the HTML, CSS and JS')
+    parser.add_argument('--out', default='dist', help='build directory, replaced on every run')
+    args = parser.parse_args()
+
+    manifest = build(args.source, args.out)
+    for name, hashed in manifest['assets'].items():
+        source_size = os.path.getsize(os.path.join(args.source, name))
+        sizes = ', '.join(
+            f"{encoding} {os.path.getsize(os.path.join(args.out, hashed + ENCODING_SUFFIXES[encoding]))}"
+            for encoding in manifest['files'][hashed]
+        )
+        print(f"{name} -> {hashed}: {source_size} -> {os.path.getsize(os.path.join(args.out, hashed))} bytes ({sizes or 'uncompressed'})")
+    print(f"{len(manifest['files'])} files written to {args.out}")
+    if brotli is None:
+        print("brotli is not installed; only gzip copies were written")
+
+if __name__ == '__main__':
+    main()
@@ -7,19 +7,137 @@ Real-time Discord server statistics and management
 import os
 import json
 import time
+import gzip
 import asyncio
+import hashlib
+import mimetypes
+import random
+import stat
+import bisect
+import base64
+import sqlite3
+import secrets
+import mmap
+import pickle
+import shutil
+import signal
+import socket
+import struct
+import tempfile
+import contextlib
 import aiohttp
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from array import array
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 from aiohttp import web, ClientSession
 import aiofiles
 import logging
+import re
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, which also has no worker mode; saves are then unlocked
+    fcntl = None
+
+try:
+    import brotli
+except ImportError:  # optional: responses are then offered as gzip only
+    brotli = None
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # optional: approved images are then served without derivatives
+    Image = None
 
 # Configuration
 DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN', 'YOUR_BOT_TOKEN_HERE')
 GUILD_ID = os.getenv('GUILD_ID', 'YOUR_GUILD_ID_HERE')
+DISCORD_API = os.getenv('DISCORD_API', 'https://discord.com/api/v10')
+DISCORD_POOL_SIZE = int(os.getenv('DISCORD_POOL_SIZE', '10'))
+DISCORD_TIMEOUT = float(os.getenv('DISCORD_TIMEOUT', '10'))
+DISCORD_CONNECT_TIMEOUT = float(os.getenv('DISCORD_CONNECT_TIMEOUT', '3'))
+DISCORD_MAX_RETRIES = int(os.getenv('DISCORD_MAX_RETRIES', '3'))
+DISCORD_BREAKER_FAILURES = int(os.getenv('DISCORD_BREAKER_FAILURES', '5'))  # failures in a row that open a route's breaker
+DISCORD_BREAKER_COOLDOWN = float(os.getenv('DISCORD_BREAKER_COOLDOWN', '30'))  # seconds an open breaker fails fast
+DISCORD_BREAKER_PROBES = 1  # calls let through at once to test a half-open route
+DISCORD_MEMBERS_PAGE = 1000  # Discord's maximum for List Guild Members
+DISCORD_GATEWAY_ENABLED = os.getenv('DISCORD_GATEWAY', '0') == '1'
+DISCORD_GATEWAY_URL = os.getenv('DISCORD_GATEWAY_URL', 'wss://gateway.discord.gg/?v=10&encoding=json')
+DISCORD_GATEWAY_INTENTS = int(os.getenv('DISCORD_GATEWAY_INTENTS', '3'))  # GUILDS | GUILD_MEMBERS
+GATEWAY_RESYNC_INTERVAL = int(os.getenv('GATEWAY_RESYNC_INTERVAL', '3600'))
+GATEWAY_KEYS = {'channels', 'moderators'}  # cache keys the gateway keeps current
+CACHE_STALE_WINDOW = float(os.getenv('CACHE_STALE_WINDOW', '300'))
+CACHE_NEGATIVE_TTL = float(os.getenv('CACHE_NEGATIVE_TTL', '15'))  # seconds before a failed refresh is retried
+CACHE_MISS_WAIT = float(os.getenv('CACHE_MISS_WAIT', '3'))  # longest a request waits on Discord before getting the fallback
+CACHE_SNAPSHOT = os.getenv('CACHE_SNAPSHOT', 'cache_snapshot.json')
+CACHE_SNAPSHOT_INTERVAL = 60
+INVITE_SEED = 'invite_cache.json'  # last known invite counts, used until a snapshot exists
+COMPRESS_MIN_SIZE = 512  # bytes; smaller bodies are sent uncompressed
+STREAM_QUEUE_SIZE = 8  # pending events per /api/stream client before it is dropped
+STREAM_KEEPALIVE = 25  # seconds between SSE comments on an idle stream
+STATIC_CACHE_MAX_FILE = 256 * 1024  # files up to this size are kept in memory
+STATIC_CACHE_MAX_BYTES = int(os.getenv('STATIC_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+STATIC_BUILD_DIR = os.getenv('STATIC_BUILD_DIR', '')  # output of build_static.py, served ahead of the sources
+STATIC_IMMUTABLE_MAX_AGE = 365 * 86400  # for hashed files, whose names change with their content
+STATIC_BUILD_POLL = 2  # seconds between checks for a rebuilt STATIC_BUILD_DIR
+JOIN_LOG = os.getenv('JOIN_LOG', 'joins.jsonl')
+JOIN_FLUSH_INTERVAL = float(os.getenv('JOIN_FLUSH_INTERVAL', '2'))
+JOIN_FLUSH_BATCH = 1000  # buffered events that trigger an early flush
+JOIN_BUFFER_MAX = 100000  # events held while the disk is unavailable before new ones are dropped
+LOOP_LAG_INTERVAL = 0.1  # seconds between event-loop lag samples
+LOOP_LAG_WARN = float(os.getenv('LOOP_LAG_WARN', '0.1'))  # log samples slower than this
+CACHE_REFRESH_AHEAD = 0.8  # refresh cache keys at 80% of their TTL
+SCHEDULER_JITTER = 0.1  # up to 10% earlier, so workers and keys drift apart
+SCHEDULER_BACKOFF_BASE = 5
+SCHEDULER_MAX_BACKOFF = 300
 UPLOAD_DIR = 'uploads'
+UPLOAD_MAX_BYTES = int(os.getenv('UPLOAD_MAX_BYTES', str(20 * 1024 * 1024)))
+UPLOAD_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+CANONICAL_EXTENSIONS = {'.jpeg': '.jpg'}  # new uploads are stored under one name per format
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_CONTENT_TYPES = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp'}
+UPLOAD_CATALOG = os.getenv('UPLOAD_CATALOG', os.path.join(UPLOAD_DIR, 'catalog.sqlite3'))
+UPLOAD_PAGE_SIZE = 50
+UPLOAD_MAX_PAGE_SIZE = 200
+GALLERY_PAGE_SIZE = 12  # images per gallery page (a 3x4 grid)
+JENNA_PAGE_SIZE = 16  # images per Jenna page (a 4x4 grid)
+FEED_MAX_PAGE_SIZE = 100
+FEED_PAGE_CACHE = 64  # encoded feed pages past the first kept in memory
+DERIVED_DIR = os.path.join(UPLOAD_DIR, 'derived')
+IMAGE_WIDTHS = (320, 640, 1280)  # responsive widths made for every approved image
+IMAGE_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+IMAGE_QUALITY = 80
+IMAGE_WORKERS = int(os.getenv('IMAGE_WORKERS', '2'))
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+JOB_MAX_QUEUED = 20
+JOB_TIMEOUT = float(os.getenv('JOB_TIMEOUT', '600'))
+JOB_HISTORY = 100  # finished jobs kept for /api/admin/jobs
+JENNA_SOURCES = [url.strip() for url in os.getenv('JENNA_SOURCES', '').split(',') if url.strip()]
+COLLECT_CONCURRENCY = 4
+MODERATION_WORKERS = int(os.getenv('MODERATION_WORKERS', '8'))  # threads moving and deleting moderated files
+MODERATION_MAX_BATCH = 1000  # ids accepted by one batch approve or reject
 DATA_DIR = '.'
+SITE_SETTINGS = os.getenv('SITE_SETTINGS', os.path.join(DATA_DIR, 'settings.json'))
+SITE_CHANNELS = os.getenv('SITE_CHANNELS', os.path.join(DATA_DIR, 'channels.json'))  # per-channel emoji/url/desc, matched by name
+SITE_ASSETS = ('banner', 'pfp')
+SITE_MAX_AGE = 60
+SITE_WRITE_DELAY = 0.5  # seconds edits are gathered before one write
+SITE_RELOAD_INTERVAL = 2  # seconds between checks for edits made by other workers
+WORKERS = int(os.getenv('WORKERS', '1'))  # more than 1 pre-forks worker processes sharing the port
+SHARED_CACHE_SIZE = int(os.getenv('SHARED_CACHE_SIZE', str(8 * 1024 * 1024)))
+SHARED_CACHE_POLL = 0.5  # seconds between followers' checks for a newer shared cache
+SHARED_CACHE_WAIT = 10  # seconds a follower waits for the leader to refresh a key
+JOB_SHARE_INTERVAL = 1  # seconds between job state copies for the other workers
+
+# Server state kept under the served tree; serve_static refuses these and SQLite's -wal/-shm files
+PRIVATE_FILES = {os.path.realpath(path) for path in (UPLOAD_CATALOG, CACHE_SNAPSHOT, JOIN_LOG)}
+
+# Types missing from some platforms' mime databases
+mimetypes.add_type('application/javascript', '.js')
+mimetypes.add_type('image/webp', '.webp')
+mimetypes.add_type('image/svg+xml', '.svg')
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -29,6 +147,21 @@ logger = logging.getLogger(__name__)
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(os.path.join(UPLOAD_DIR, 'pending'), exist_ok=True)
 os.makedirs(os.path.join(UPLOAD_DIR, 'approved'), exist_ok=True)
+os.makedirs(os.path.join(UPLOAD_DIR, 'tmp'), exist_ok=True)
+os.makedirs(DERIVED_DIR, exist_ok=True)
+
+# Background jobs registered with schedule_job and their running tasks
+SCHEDULED_JOBS = web.AppKey('scheduled_jobs', list)
+SCHEDULER_TASKS = web.AppKey('scheduler_tasks', list)
+
+# Small static files by path: body, ETag and Last-Modified, least recently used first
+static_cache: 'OrderedDict[str, Dict]' = OrderedDict()
+
+# manifest.json of STATIC_BUILD_DIR: hashed names and the encodings written for each file
+static_build: Optional[Dict] = None
+
+# Encoded image feed pages past the first, by (cache key, cursor, limit), least recently used first
+feed_pages: 'OrderedDict[tuple, Dict]' = OrderedDict()
 
 # Cache for API responses
 cache = {
@@ -39,6 +172,17 @@ cache = {
     'jenna': {'data': None, 'expires': 0}
 }
 
+# In-flight cache refreshes, at most one per cache key
+cache_refreshes: Dict[str, asyncio.Task] = {}
+
+# Derivative manifests by approved filename, and the jobs still making them
+derivatives: Dict[str, Dict] = {}
+derivative_jobs: Dict[str, asyncio.Task] = {}
+
+# Set in each worker process by run_workers; both stay None in a single process
+shared_cache: Optional['SharedCache'] = None
+job_state_dir: Optional[str] = None
+
 # Default channel data
 DEFAULT_CHANNELS = [
     {"name": "#chat", "emoji": "💬", "url": f"https://discord.com/channels/{GUILD_ID}/chat", "desc": "General conversation, introductions, and daily chat."},
@@ -59,6 +203,17 @@ DEFAULT_CHANNELS = [
     {"name": "#self-promo", "emoji": "📣", "url": f"https://discord.com/channels/{GUILD_ID}/self-promo", "desc": "Promote your work and social links (follow the rules)."}
 ]
 
+DEFAULT_GUILD = {
+    'name': 'Jenna Ortega Fan Server',
+    'icon': None,
+    'member_count': 1000,
+    'presence_count': 200
+}
+
+# Staff role names (lowercase) and the title shown for them, highest rank first
+STAFF_ROLE_TITLES = {'owner': 'Owner', 'admin': 'Admin', 'moderator': 'Moderator', 'staff': 'Moderator'}
+STAFF_RANKS = ['Owner', 'Admin', 'Moderator']
+
 DEFAULT_MODERATORS = [
     {"name": "Server Owner", "role": "Owner", "avatar": "https://cdn.discordapp.com/embed/avatars/0.png", "join_date": "2023-01-01"},
     {"name": "Lead Moderator", "role": "Admin", "avatar": "https://cdn.discordapp.com/embed/avatars/1.png", "join_date": "2023-02-15"},
@@ -86,349 +241,2009 @@ JENNA_DATA = {
     ]
 }
 
-async def get_discord_stats(session: ClientSession) -> Dict:
-    """Fetch real Discord server stats"""
-    try:
-        headers = {'Authorization': f'Bot {DISCORD_BOT_TOKEN}'}
-        
-        # Get guild info
-        async with session.get(f'https://discord.com/api/v10/guilds/{GUILD_ID}?with_counts=true') as resp:
-            if resp.status == 200:
-                guild_data = await resp.json()
-                return {
-                    'guild': {
-                        'name': guild_data.get('name', 'Jenna Ortega Fan Server'),
-                        'icon': guild_data.get('icon'),
-                        'member_count': guild_data.get('approximate_member_count', 0),
-                        'presence_count': guild_data.get('approximate_presence_count', 0)
-                    },
-                    'fetched_at': int(time.time()),
-                    'cached': False
+# Metrics, rendered in Prometheus text format at /metrics
+
+class Metric:
+    """One metric family: a value per label tuple"""
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, help_text: str, labels: tuple = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.values: Dict[tuple, float] = {}
+        METRICS.append(self)
+    
+    def label_text(self, values: tuple, extra: str = '') -> str:
+        pairs = [f'{name}="{escape_label(str(value))}"' for name, value in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+    
+    def render(self) -> List[str]:
+        return [f'{self.name}{self.label_text(labels)} {value:g}' for labels, value in self.values.items()]
+
+class Counter(Metric):
+    kind = 'counter'
+    
+    def inc(self, labels: tuple = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+class Gauge(Metric):
+    kind = 'gauge'
+    
+    def set(self, labels: tuple, value: float):
+        self.values[labels] = value
+
+class Histogram(Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help_text: str, labels: tuple = (), buckets: tuple = ()):
+        super().__init__(name, help_text, labels)
+        self.buckets = buckets
+        self.series: Dict[tuple, list] = {}  # labels -> [per-bucket counts (+Inf last), sum]
+    
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+    
+    def render(self) -> List[str]:
+        lines = []
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound:g}"'
+                lines.append(f'{self.name}_bucket{self.label_text(labels, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{self.label_text(labels)} {total:g}')
+            lines.append(f'{self.name}_count{self.label_text(labels)} {cumulative}')
+        return lines
+
+def escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def render_metrics() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.append(f'# HELP {metric.name} {metric.help}')
+        lines.append(f'# TYPE {metric.name} {metric.kind}')
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+METRICS: List[Metric] = []
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+http_requests = Counter('http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+http_latency = Histogram('http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route'), LATENCY_BUCKETS)
+cache_lookups = Counter('cache_requests_total', 'Cache reads by key and result (hit, stale, miss)', ('key', 'result'))
+cache_refreshes_total = Counter('cache_refreshes_total', 'Cache refreshes by key and result', ('key', 'result'))
+discord_requests = Counter('discord_requests_total', 'Discord API calls by route and status', ('route', 'status'))
+discord_latency = Histogram('discord_request_duration_seconds', 'Discord API call latency by route', ('route',), LATENCY_BUCKETS)
+discord_errors = Counter('discord_errors_total', 'Failed Discord API calls by route and error', ('route', 'error'))
+discord_breaker = Gauge('discord_circuit_state', 'Discord circuit breaker by route (0 closed, 1 half-open, 2 open)', ('route',))
+loop_lag = Histogram('event_loop_lag_seconds', 'How late the event loop ran a timer', (), LAG_BUCKETS)
+loop_lag_max = Gauge('event_loop_lag_max_seconds', 'Largest event loop lag since startup')
+
+def metric_route(path: str) -> str:
+    """A Discord path with snowflakes folded, for bounded label values"""
+    return re.sub(r'\d{5,}', '{id}', path)
+
+class DiscordError(Exception):
+    """Discord API request failed"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+class CircuitOpen(DiscordError):
+    """Refused without calling Discord while the route's breaker is open"""
+
+class CircuitBreaker:
+    """Fail fast on a Discord route that keeps failing
+    
+    closed: calls go through; DISCORD_BREAKER_FAILURES failures in a row open it.
+    open: calls fail at once until DISCORD_BREAKER_COOLDOWN has passed.
+    half_open: up to DISCORD_BREAKER_PROBES calls test the route; a success
+    closes the breaker and a failure opens it again.
+    """
+    
+    STATES = {'closed': 0, 'half_open': 1, 'open': 2}
+    
+    def __init__(self, route: str):
+        self.route = route
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = 0
+        discord_breaker.set((route,), 0)
+    
+    def _set(self, state: str):
+        if state != self.state:
+            logger.warning(f"Discord breaker for {self.route}: {self.state} -> {state}")
+            self.state = state
+            discord_breaker.set((self.route,), self.STATES[state])
+        self.probing = 0
+    
+    def retry_in(self) -> float:
+        if self.state != 'open':
+            return 0.0
+        return max(0.0, self.opened_at + DISCORD_BREAKER_COOLDOWN - time.monotonic())
+    
+    def allow(self) -> bool:
+        """Take a slot for one call; False means fail fast"""
+        if self.state == 'open':
+            if self.retry_in() > 0:
+                return False
+            self._set('half_open')
+        if self.state == 'half_open':
+            if self.probing >= DISCORD_BREAKER_PROBES:
+                return False
+            self.probing += 1
+        return True
+    
+    def done(self, healthy: Optional[bool]):
+        """Record a call's outcome; None (rate limited, cancelled) says nothing about health"""
+        if healthy is None:
+            if self.state == 'half_open':
+                self.probing = max(0, self.probing - 1)
+        elif healthy:
+            self.failures = 0
+            self._set('closed')
+        else:
+            self.failures += 1
+            if self.state != 'closed' or self.failures >= DISCORD_BREAKER_FAILURES:
+                self.opened_at = time.monotonic()
+                self._set('open')
+
+class DiscordClient:
+    """Discord REST client that honours per-route buckets and the global rate limit"""
+
+    def __init__(self, session: ClientSession, max_retries: int = DISCORD_MAX_RETRIES):
+        self.session = session
+        self.max_retries = max_retries
+        self.route_buckets: Dict[str, str] = {}  # 'GET /guilds/1/roles' -> bucket key
+        self.buckets: Dict[str, Dict] = {}  # bucket key -> limit/remaining/reset_at/window
+        self.bucket_locks: Dict[str, asyncio.Lock] = {}
+        self.discovery_locks: Dict[str, asyncio.Lock] = {}
+        self.unbucketed_routes = set()  # routes Discord sends no bucket headers for
+        self.global_reset_at = 0.0
+        self.breakers: Dict[str, CircuitBreaker] = {}  # metric route label -> breaker
+
+    async def get(self, path: str, params: Optional[Dict] = None):
+        """GET a Discord API path and return the decoded JSON"""
+        return await self.request('GET', path, params=params)
+
+    async def request(self, method: str, path: str, **kwargs):
+        """Send a request, queueing behind exhausted buckets and retrying 429s
+        
+        Raises CircuitOpen at once while the route's breaker is open.
+        """
+        route = f'{method} {path}'
+        label = f'{method} {metric_route(path)}'
+        breaker = self.breakers.get(label)
+        if breaker is None:
+            breaker = self.breakers[label] = CircuitBreaker(label)
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                discord_errors.inc((label, 'circuit_open'))
+                raise CircuitOpen(f"{route} skipped: Discord is failing, retrying in {breaker.retry_in():.0f}s")
+            healthy = None
+            try:
+                discovery = await self._acquire(route)
+            except BaseException:
+                breaker.done(None)
+                raise
+            started = time.perf_counter()
+            status = 'error'
+            try:
+                async with self.session.request(method, f'{DISCORD_API}{path}', **kwargs) as resp:
+                    status = str(resp.status)
+                    self._update_bucket(route, path, resp.headers)
+                    if resp.status == 429:
+                        discord_errors.inc((label, 'rate_limited'))
+                        retry_after = await self._handle_429(resp)
+                    elif resp.status >= 400:
+                        # Only server errors mean Discord is unhealthy; a 4xx is our request
+                        healthy = resp.status < 500
+                        discord_errors.inc((label, 'http_error'))
+                        raise DiscordError(f"{route} failed: {resp.status}", resp.status)
+                    else:
+                        data = await resp.json()
+                        healthy = True
+                        return data
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                healthy = False
+                discord_errors.inc((label, type(e).__name__))
+                raise
+            finally:
+                breaker.done(healthy)
+                discord_requests.inc((label, status))
+                discord_latency.observe((label,), time.perf_counter() - started)
+                if discovery:
+                    discovery.release()
+            
+            if attempt == self.max_retries:
+                break
+            logger.warning(f"Rate limited on {route}, retrying in {retry_after:.2f}s")
+            await asyncio.sleep(retry_after)
+        
+        raise DiscordError(f"{route} still rate limited after {self.max_retries} retries", 429)
+
+    async def _acquire(self, route: str) -> Optional[asyncio.Lock]:
+        # Global limit applies to every route
+        delay = self.global_reset_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        
+        # Until Discord tells us a route's bucket, send one request at a time;
+        # the caller releases the returned lock once the headers are read
+        while route not in self.route_buckets and route not in self.unbucketed_routes:
+            lock = self.discovery_locks.setdefault(route, asyncio.Lock())
+            if not lock.locked():
+                await lock.acquire()
+                return lock
+            async with lock:
+                pass
+        
+        key = self.route_buckets.get(route)
+        if key is None:
+            return None
+        
+        # Requests for one bucket take slots in arrival order
+        async with self.bucket_locks.setdefault(key, asyncio.Lock()):
+            bucket = self.buckets[key]
+            while True:
+                now = time.monotonic()
+                if bucket['reset_at'] <= now:
+                    bucket['remaining'] = bucket['limit']
+                    bucket['reset_at'] = now + bucket['window']
+                if bucket['remaining'] > 0:
+                    bucket['remaining'] -= 1
+                    return None
+                # Responses arriving meanwhile may move the reset, so re-check after waking
+                await asyncio.sleep(bucket['reset_at'] - now)
+
+    def _update_bucket(self, route: str, path: str, headers):
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+        if bucket_hash is None or 'X-RateLimit-Limit' not in headers:
+            if not headers.get('X-RateLimit-Global'):
+                self.unbucketed_routes.add(route)
+            return
+        
+        # Buckets are shared per major parameter, e.g. per guild
+        major = re.match(r'/(?:guilds|channels|webhooks)/(\d+)', path)
+        key = f"{bucket_hash}:{major.group(1)}" if major else bucket_hash
+        reset_after = float(headers.get('X-RateLimit-Reset-After', 0))
+        reset_at = time.monotonic() + reset_after
+        remaining = int(headers.get('X-RateLimit-Remaining', 0))
+        
+        # Within the same window, slots we already handed out still count
+        previous = self.buckets.get(key)
+        if previous and abs(previous['reset_at'] - reset_at) < 0.5:
+            remaining = min(remaining, previous['remaining'])
+        
+        self.route_buckets[route] = key
+        self.buckets.setdefault(key, {}).update({
+            'limit': int(headers['X-RateLimit-Limit']),
+            'remaining': remaining,
+            'reset_at': reset_at,
+            'window': max(reset_after, previous['window'] if previous else 0)
+        })
+
+    async def _handle_429(self, resp) -> float:
+        try:
+            body = await resp.json()
+        except Exception:
+            body = {}
+        retry_after = float(body.get('retry_after') or resp.headers.get('Retry-After') or 1)
+        
+        if body.get('global') or resp.headers.get('X-RateLimit-Global'):
+            self.global_reset_at = time.monotonic() + retry_after
+        return retry_after
+
+    def bucket_state(self) -> Dict:
+        """Snapshot of known buckets for diagnostics"""
+        now = time.monotonic()
+        routes: Dict[str, List[str]] = {}
+        for route, key in self.route_buckets.items():
+            routes.setdefault(key, []).append(route)
+        
+        return {
+            'global_reset_in': round(max(0.0, self.global_reset_at - now), 3),
+            'breakers': {
+                label: {'state': breaker.state, 'failures': breaker.failures, 'retry_in': round(breaker.retry_in(), 3)}
+                for label, breaker in self.breakers.items()
+            },
+            'buckets': {
+                key: {
+                    'routes': routes.get(key, []),
+                    'limit': bucket['limit'],
+                    'remaining': bucket['remaining'],
+                    'reset_in': round(max(0.0, bucket['reset_at'] - now), 3)
                 }
-            else:
-                logger.warning(f"Failed to fetch guild info: {resp.status}")
-                
-    except Exception as e:
-        logger.error(f"Error fetching Discord stats: {e}")
+                for key, bucket in self.buckets.items()
+            }
+        }
+
+# App-scoped Discord client (see start_discord_client)
+DISCORD_CLIENT = web.AppKey('discord_client', DiscordClient)
+
+def channel_emoji(name: str) -> str:
+    """Pick a display emoji from a channel name"""
+    name = name.lower()
+    if "jenna" in name:
+        return "⭐"
+    elif "media" in name:
+        return "🖼️"
+    elif "event" in name:
+        return "🎉"
+    elif "spam" in name:
+        return "😂"
+    elif "bot" in name:
+        return "🤖"
+    elif "selfie" in name:
+        return "🤳"
+    elif "starboard" in name:
+        return "🏆"
+    elif "count" in name:
+        return "🔢"
+    elif "birthday" in name:
+        return "🎂"
+    elif "booster" in name:
+        return "🎁"
+    elif "promo" in name:
+        return "📣"
+    elif "wear" in name or "tear" in name:
+        return "👗"
+    elif "fact" in name or "qotd" in name:
+        return "🧠"
+    return "💬"
+
+def format_channel(channel: Dict) -> Optional[Dict]:
+    """Format a Discord channel for the site, or None if it is not listed"""
+    if channel['type'] not in [0, 5]:  # Text channels and announcement channels
+        return None
+    return {
+        "id": channel['id'],
+        "name": f"#{channel['name']}",
+        "emoji": channel_emoji(channel['name']),
+        "url": f"https://discord.com/channels/{GUILD_ID}/{channel['id']}",
+        "desc": channel.get('topic', f"#{channel['name']} channel")
+    }
+
+def format_channels(channels_data: List[Dict]) -> List[Dict]:
+    """Filter and format channels"""
+    return [entry for entry in map(format_channel, channels_data) if entry]
+
+async def get_discord_stats(client: DiscordClient) -> Dict:
+    """Fetch real Discord server stats"""
+    # Get guild info
+    guild_data = await client.get(f'/guilds/{GUILD_ID}', params={'with_counts': 'true'})
     
-    # Fallback to cached or default data
     return {
         'guild': {
-            'name': 'Jenna Ortega Fan Server',
-            'icon': None,
-            'member_count': 1000,
-            'presence_count': 200
+            'name': guild_data.get('name', 'Jenna Ortega Fan Server'),
+            'icon': guild_data.get('icon'),
+            'member_count': guild_data.get('approximate_member_count', 0),
+            'presence_count': guild_data.get('approximate_presence_count', 0)
         },
         'fetched_at': int(time.time()),
-        'cached': True
+        'cached': False
     }
 
-async def get_discord_channels(session: ClientSession) -> Dict:
+async def get_discord_channels(client: DiscordClient) -> Dict:
     """Fetch real Discord channels"""
-    try:
-        headers = {'Authorization': f'Bot {DISCORD_BOT_TOKEN}'}
-        
-        async with session.get(f'https://discord.com/api/v10/guilds/{GUILD_ID}/channels') as resp:
-            if resp.status == 200:
-                channels_data = await resp.json()
-                
-                # Filter and format channels
-                channels = []
-                for channel in channels_data:
-                    if channel['type'] in [0, 5]:  # Text channels and announcement channels
-                        emoji = "💬"
-                        if "jenna" in channel['name'].lower():
-                            emoji = "⭐"
-                        elif "media" in channel['name'].lower():
-                            emoji = "🖼️"
-                        elif "event" in channel['name'].lower():
-                            emoji = "🎉"
-                        elif "spam" in channel['name'].lower():
-                            emoji = "😂"
-                        elif "bot" in channel['name'].lower():
-                            emoji = "🤖"
-                        elif "selfie" in channel['name'].lower():
-                            emoji = "🤳"
-                        elif "starboard" in channel['name'].lower():
-                            emoji = "🏆"
-                        elif "count" in channel['name'].lower():
-                            emoji = "🔢"
-                        elif "birthday" in channel['name'].lower():
-                            emoji = "🎂"
-                        elif "booster" in channel['name'].lower():
-                            emoji = "🎁"
-                        elif "promo" in channel['name'].lower():
-                            emoji = "📣"
-                        elif "wear" in channel['name'].lower() or "tear" in channel['name'].lower():
-                            emoji = "👗"
-                        elif "fact" in channel['name'].lower() or "qotd" in channel['name'].lower():
-                            emoji = "🧠"
-                        elif "bot" in channel['name'].lower():
-                            emoji = "🤖"
-                        
-                        channels.append({
-                            "name": f"#{channel['name']}",
-                            "emoji": emoji,
-                            "url": f"https://discord.com/channels/{GUILD_ID}/{channel['id']}",
-                            "desc": channel.get('topic', f"#{channel['name']} channel")
-                        })
-                
-                return {'channels': channels, 'fetched_at': int(time.time())}
+    channels_data = await client.get(f'/guilds/{GUILD_ID}/channels')
+    return {'channels': format_channels(channels_data), 'fetched_at': int(time.time())}
+
+class MemberStore:
+    """Compact guild member table, updated in place by member id
+
+    Members live in parallel arrays indexed by row: user id, packed join
+    time, bot flag, sync generation and an interned tuple of role numbers.
+    Only staff keep their name and avatar, in a separate staff index.
+    """
+
+    def __init__(self):
+        self.rows: Dict[int, int] = {}  # user id -> row
+        self.user_ids = array('Q')
+        self.joined = array('I')  # unix seconds
+        self.bots = bytearray()
+        self.generations = array('I')
+        self.roles: List[tuple] = []
+        self.role_numbers: Dict[str, int] = {}  # role snowflake -> small int
+        self.role_sets: Dict[tuple, tuple] = {}  # interned role combinations
+        self.role_ranks: Dict[int, int] = {}  # role number -> staff rank
+        self.staff: Dict[int, Dict] = {}  # user id -> rank/name/avatar
+        self.generation = 0
+        self.synced = False  # a full sync has completed at least once
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+    def _role_number(self, role_id: str) -> int:
+        number = self.role_numbers.get(role_id)
+        if number is None:
+            number = self.role_numbers[role_id] = len(self.role_numbers)
+        return number
+
+    def _intern_roles(self, role_ids: List[str]) -> tuple:
+        key = tuple(sorted(self._role_number(role_id) for role_id in role_ids))
+        return self.role_sets.setdefault(key, key)
+
+    def _rank(self, roles: tuple) -> Optional[int]:
+        ranks = [self.role_ranks[number] for number in roles if number in self.role_ranks]
+        return min(ranks) if ranks else None
+
+    def set_roles(self, roles_data: List[Dict]) -> bool:
+        """Load guild roles and re-rank current staff; True if staff roles changed
+
+        Members who only now hold a staff role are picked up by their next upsert.
+        """
+        role_ranks = {
+            self._role_number(role_id): rank
+            for role_id, rank in build_role_ranks(roles_data).items()
+        }
+        if role_ranks == self.role_ranks:
+            return False
+        self.role_ranks = role_ranks
+        for user_id in list(self.staff):
+            rank = self._rank(self.roles[self.rows[user_id]])
+            if rank is None:
+                del self.staff[user_id]
             else:
-                logger.warning(f"Failed to fetch channels: {resp.status}")
-                
-    except Exception as e:
-        logger.error(f"Error fetching channels: {e}")
-    
-    return {'channels': DEFAULT_CHANNELS, 'fetched_at': int(time.time())}
+                self.staff[user_id]['rank'] = rank
+        return True
+
+    def upsert(self, member: Dict):
+        """Insert or update one member from a Discord member object"""
+        user = member['user']
+        user_id = int(user['id'])
+        roles = self._intern_roles(member.get('roles', []))
+        joined = parse_timestamp(member.get('joined_at'))
+        
+        row = self.rows.get(user_id)
+        if row is not None and not joined:
+            joined = self.joined[row]
+        if row is None:
+            self.rows[user_id] = len(self.user_ids)
+            self.user_ids.append(user_id)
+            self.joined.append(joined)
+            self.bots.append(1 if user.get('bot') else 0)
+            self.generations.append(self.generation)
+            self.roles.append(roles)
+        else:
+            self.joined[row] = joined
+            self.bots[row] = 1 if user.get('bot') else 0
+            self.generations[row] = self.generation
+            self.roles[row] = roles
+        
+        rank = None if user.get('bot') else self._rank(roles)
+        if rank is None:
+            self.staff.pop(user_id, None)
+        else:
+            self.staff[user_id] = {
+                'rank': rank,
+                'name': user.get('global_name') or user.get('username'),
+                'avatar': avatar_url(user)
+            }
+
+    def remove(self, user_id: int):
+        """Drop a member, moving the last row into its slot"""
+        row = self.rows.pop(user_id, None)
+        if row is None:
+            return
+        last = len(self.user_ids) - 1
+        if row != last:
+            moved_id = self.user_ids[last]
+            self.user_ids[row] = moved_id
+            self.joined[row] = self.joined[last]
+            self.bots[row] = self.bots[last]
+            self.generations[row] = self.generations[last]
+            self.roles[row] = self.roles[last]
+            self.rows[moved_id] = row
+        self.user_ids.pop()
+        self.joined.pop()
+        self.bots.pop()
+        self.generations.pop()
+        self.roles.pop()
+        self.staff.pop(user_id, None)
+
+    def begin_sync(self) -> int:
+        """Start a full sync; members not upserted before end_sync are removed"""
+        self.generation = (self.generation + 1) % 2 ** 32
+        return self.generation
+
+    def end_sync(self, generation: int) -> int:
+        """Remove members the sync did not see and return how many left"""
+        gone = [self.user_ids[row] for row in range(len(self.user_ids)) if self.generations[row] != generation]
+        for user_id in gone:
+            self.remove(user_id)
+        self.synced = True
+        return len(gone)
+
+    def moderators(self, limit: int = 10) -> List[Dict]:
+        """Staff ordered by rank, then join date"""
+        ordered = sorted(self.staff.items(), key=lambda item: (item[1]['rank'], self.joined[self.rows[item[0]]]))
+        return [
+            {
+                "name": info['name'],
+                "role": STAFF_RANKS[info['rank']],
+                "avatar": info['avatar'],
+                "join_date": datetime.fromtimestamp(self.joined[self.rows[user_id]], timezone.utc).isoformat()
+            }
+            for user_id, info in ordered[:limit]
+        ]
 
-async def get_discord_moderators(session: ClientSession) -> Dict:
+# Guild members behind /api/moderators
+member_store = MemberStore()
+
+def build_role_ranks(roles_data: List[Dict]) -> Dict[str, int]:
+    """Index staff role ids by rank (position in STAFF_RANKS, 0 = Owner)"""
+    ranks = {}
+    for role in roles_data:
+        title = STAFF_ROLE_TITLES.get(role['name'].lower())
+        if title:
+            ranks[role['id']] = STAFF_RANKS.index(title)
+    return ranks
+
+def parse_timestamp(value: Optional[str]) -> int:
+    """Unix seconds from a Discord ISO8601 timestamp (0 if missing)"""
+    if not value:
+        return 0
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp())
+
+def avatar_url(user: Dict) -> str:
+    """CDN URL for a user's avatar, or Discord's default avatar"""
+    if user.get('avatar'):
+        return f"https://cdn.discordapp.com/avatars/{user['id']}/{user['avatar']}.png"
+    return 'https://cdn.discordapp.com/embed/avatars/0.png'
+
+async def iter_guild_members(client: DiscordClient) -> AsyncIterator[List[Dict]]:
+    """Page through every guild member using Discord's `after` cursor"""
+    after = '0'
+    while True:
+        page = await client.get(f'/guilds/{GUILD_ID}/members', params={'limit': DISCORD_MEMBERS_PAGE, 'after': after})
+        if page:
+            yield page
+        if len(page) < DISCORD_MEMBERS_PAGE:
+            return
+        after = page[-1]['user']['id']
+
+async def get_discord_moderators(client: DiscordClient) -> Dict:
     """Fetch real Discord moderators"""
+    # Roles load while the first member page is in flight
+    roles_task = asyncio.ensure_future(client.get(f'/guilds/{GUILD_ID}/roles'))
+    generation = member_store.begin_sync()
+    roles_loaded = False
+    
     try:
-        headers = {'Authorization': f'Bot {DISCORD_BOT_TOKEN}'}
-        
-        # Get guild members with roles
-        async with session.get(f'https://discord.com/api/v10/guilds/{GUILD_ID}/members?limit=1000') as resp:
-            if resp.status == 200:
-                members_data = await resp.json()
-                
-                # Get guild roles to identify staff
-                async with session.get(f'https://discord.com/api/v10/guilds/{GUILD_ID}/roles') as roles_resp:
-                    roles_data = await roles_resp.json() if roles_resp.status == 200 else []
-                
-                # Identify staff roles
-                staff_roles = [role['id'] for role in roles_data if role['name'].lower() in ['owner', 'admin', 'moderator', 'staff']]
-                
-                moderators = []
-                for member in members_data:
-                    # Check if member has staff roles
-                    is_staff = any(role_id in member['roles'] for role_id in staff_roles)
-                    
-                    if is_staff or member.get('user', {}).get('bot') == False:
-                        # For demo purposes, we'll create a mix of real and fake data
-                        moderators.append({
-                            "name": member['user']['username'] if 'user' in member else f"Moderator {len(moderators) + 1}",
-                            "role": "Owner" if "owner" in [role['name'].lower() for role in roles_data if role['id'] in member.get('roles', [])] else "Admin" if any(role['name'].lower() == 'admin' for role in roles_data if role['id'] in member.get('roles', [])) else "Moderator",
-                            "avatar": member['user'].get('avatar', 'https://cdn.discordapp.com/embed/avatars/0.png'),
-                            "join_date": member.get('joined_at', '2023-01-01T00:00:00.000Z')
-                        })
-                        
-                        if len(moderators) >= 10:  # Limit to 10 moderators
-                            break
-                
-                return {'moderators': moderators, 'fetched_at': int(time.time())}
-            else:
-                logger.warning(f"Failed to fetch moderators: {resp.status}")
-                
-    except Exception as e:
-        logger.error(f"Error fetching moderators: {e}")
+        async for page in iter_guild_members(client):
+            if not roles_loaded:
+                member_store.set_roles(await roles_task)
+                roles_loaded = True
+            for member in page:
+                member_store.upsert(member)
+    finally:
+        roles_task.cancel()
+    
+    removed = member_store.end_sync(generation)
+    if removed:
+        logger.info(f"Member sync removed {removed} departed members")
     
+    return {'moderators': member_store.moderators(10), 'fetched_at': int(time.time())}  # Limit to 10 moderators
+
+def default_stats() -> Dict:
+    """Demo stats served when Discord is unavailable"""
+    return {'guild': dict(DEFAULT_GUILD), 'fetched_at': int(time.time()), 'cached': True}
+
+def default_channels() -> Dict:
+    """Demo channels served when Discord is unavailable"""
+    return {'channels': DEFAULT_CHANNELS, 'fetched_at': int(time.time())}
+
+def default_moderators() -> Dict:
+    """Demo moderators served when Discord is unavailable"""
     return {'moderators': DEFAULT_MODERATORS, 'fetched_at': int(time.time())}
 
-# API Routes
+async def gallery_page(app, limit: int, cursor: Optional[str] = None) -> Dict:
+    """One page of approved uploads, newest first"""
+    catalog = app[UPLOAD_CATALOG_KEY]
+    uploads, next_cursor = await catalog.run(catalog.page, 'approved', limit, cursor, True)
+    counts = await catalog.run(catalog.counts)
+    await load_derivatives([upload['filename'] for upload in uploads])
+    return {
+        'images': [
+            with_derivatives({
+                "url": f"/uploads/approved/{upload['filename']}",
+                "uploader": upload['uploader'],
+                "uploaded_at": upload['uploaded_at']
+            })
+            for upload in uploads
+        ],
+        'next_cursor': next_cursor,
+        'total': counts['approved']
+    }
 
-async def api_invite(request):
-    """Get invite statistics"""
-    current_time = time.time()
+async def jenna_page(app, limit: int, cursor: Optional[str] = None) -> Dict:
+    """One page of images added to the Jenna page, newest first"""
+    catalog = app[UPLOAD_CATALOG_KEY]
+    items, next_cursor = await catalog.run(catalog.jenna_page, limit, cursor)
+    total = await catalog.run(catalog.jenna_count)
+    await load_derivatives([item['filename'] for item in items])
+    return {
+        'images': [
+            with_derivatives({
+                "url": f"/uploads/approved/{item['filename']}",
+                "alt": item['alt'],
+                "added_at": item['added_at']
+            })
+            for item in items
+        ],
+        'next_cursor': next_cursor,
+        'total': total
+    }
+
+async def build_gallery(app) -> Dict:
+    """First gallery page; the demo images until something is approved"""
+    page = await gallery_page(app, GALLERY_PAGE_SIZE)
+    if not page['total']:
+        page['images'] = GALLERY_DATA['images']
+    return page
+
+async def build_jenna(app) -> Dict:
+    """First Jenna page; the demo images until something is added"""
+    page = await jenna_page(app, JENNA_PAGE_SIZE)
+    if not page['total']:
+        page['images'] = JENNA_DATA['images']
+    return page
+
+# Paged image feeds: cache key, first page size, and the page builder
+FEEDS = {
+    'gallery': (GALLERY_PAGE_SIZE, gallery_page),
+    'jenna': (JENNA_PAGE_SIZE, jenna_page)
+}
+
+# Cache sources: how each cache key is filled, how long it lives, and what
+# to serve if the first fill fails. The scheduler refreshes every key ahead
+# of its TTL, so handlers normally only read.
+# max_age is the browser Cache-Control lifetime; ETags make revalidation cheap.
+CACHE_SOURCES = {
+    'invite_stats': {
+        'ttl': 60,
+        'max_age': 15,
+        'fetch': lambda app: get_discord_stats(app[DISCORD_CLIENT]),
+        'fallback': default_stats
+    },
+    'channels': {
+        'ttl': 300,
+        'max_age': 60,
+        'fetch': lambda app: get_discord_channels(app[DISCORD_CLIENT]),
+        'fallback': default_channels
+    },
+    'moderators': {
+        'ttl': 600,
+        'max_age': 60,
+        'fetch': lambda app: get_discord_moderators(app[DISCORD_CLIENT]),
+        'fallback': default_moderators
+    },
+    'gallery': {'ttl': 120, 'max_age': 30, 'fetch': build_gallery, 'fallback': None},
+    'jenna': {'ttl': 300, 'max_age': 60, 'fetch': build_jenna, 'fallback': None}
+}
+
+# Discord client lifecycle
+
+async def start_discord_client(app):
+    """Open one pooled keep-alive Discord client for the app lifetime"""
+    connector = aiohttp.TCPConnector(
+        limit=DISCORD_POOL_SIZE,
+        limit_per_host=DISCORD_POOL_SIZE,
+        ttl_dns_cache=300,
+        keepalive_timeout=60
+    )
+    timeout = aiohttp.ClientTimeout(total=DISCORD_TIMEOUT, sock_connect=DISCORD_CONNECT_TIMEOUT)
+    session = ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={'Authorization': f'Bot {DISCORD_BOT_TOKEN}'}
+    )
+    app[DISCORD_CLIENT] = DiscordClient(session)
+
+async def close_discord_client(app):
+    """Close the Discord client's session and connection pool"""
+    await app[DISCORD_CLIENT].session.close()
+
+# Cache helpers
+
+def encode_payload(data) -> Dict:
+    """Serialize data once into JSON bytes, compressed variants and ETags"""
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    digest = hashlib.blake2b(body, digest_size=12).hexdigest()
     
-    if cache['invite_stats']['data'] and cache['invite_stats']['expires'] > current_time:
-        return web.json_response(cache['invite_stats']['data'])
+    # Each encoding is a different representation, so each gets its own strong ETag
+    variants = {'identity': (body, f'"{digest}"')}
+    if len(body) >= COMPRESS_MIN_SIZE:
+        variants['gzip'] = (gzip.compress(body, 6), f'"{digest}-gz"')
+        if brotli:
+            variants['br'] = (brotli.compress(body, quality=9), f'"{digest}-br"')
+    return variants
+
+def pick_encoding(accept_encoding: str, variants: Dict) -> str:
+    """Best available encoding the client accepts"""
+    accepted = set()
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        q = re.search(r'q\s*=\s*([0-9.]+)', params)
+        if not q or float(q.group(1)) > 0:
+            accepted.add(name.strip().lower())
+    for encoding in ('br', 'gzip'):
+        if encoding in variants and encoding in accepted:
+            return encoding
+    return 'identity'
+
+def etag_matches(request, etags) -> bool:
+    """True if If-None-Match names any of our ETags"""
+    if_none_match = request.headers.get('If-None-Match', '')
+    if not if_none_match:
+        return False
+    client_tags = {re.sub(r'^W/', '', tag.strip()) for tag in if_none_match.split(',')}
+    return '*' in client_tags or bool(client_tags & set(etags))
+
+def payload_response(request, variants: Dict, max_age: int) -> web.Response:
+    """Respond with pre-encoded bytes, or 304 if the client's copy is current"""
+    encoding = pick_encoding(request.headers.get('Accept-Encoding', ''), variants)
+    body, etag = variants[encoding]
+    headers = {
+        'ETag': etag,
+        'Cache-Control': f'public, max-age={max_age}',
+        'Vary': 'Accept-Encoding'
+    }
     
-    async with aiohttp.ClientSession() as session:
-        stats = await get_discord_stats(session)
+    if etag_matches(request, {tag for _, tag in variants.values()}):
+        return web.Response(status=304, headers=headers)
     
-    cache['invite_stats'] = {
-        'data': stats,
-        'expires': current_time + 60  # Cache for 60 seconds
-    }
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return web.Response(body=body, content_type='application/json', charset='utf-8', headers=headers)
+
+def store_cache(key: str, data: Dict, synced: bool = True):
+    """Replace a cache entry; synced marks a full load from the source"""
+    current_time = time.time()
+    set_cache_entry(key, {
+        'data': data,
+        'payload': encode_payload(data),
+        'expires': current_time + CACHE_SOURCES[key]['ttl'],
+        'synced_at': current_time if synced else cache[key].get('synced_at', 0)
+    })
+
+def set_cache_entry(key: str, entry: Dict):
+    previous = cache[key].get('payload')
+    payload = entry['payload']
+    cache[key] = entry
+    share_cache()
     
-    return web.json_response(stats)
+    # Later pages of a refreshed feed may have shifted too
+    if key in FEEDS:
+        for page_key in [page_key for page_key in feed_pages if page_key[0] == key]:
+            del feed_pages[page_key]
+    
+    # Push changed stats to /api/stream once, however many clients listen
+    if key == 'invite_stats' and (previous is None or previous['identity'][1] != payload['identity'][1]):
+        stats_stream.publish(sse_event('invite', payload['identity'][0]))
 
-async def api_channels(request):
-    """Get server channels"""
+def store_stale(key: str, data: Dict):
+    """Serve data flagged stale after a failed refresh, and retry after CACHE_NEGATIVE_TTL"""
+    if not data.get('stale'):
+        store_cache(key, {**data, 'stale': True}, synced=False)
+    cache[key]['expires'] = time.time() + CACHE_NEGATIVE_TTL
+    share_cache()
+
+def refresh_cache(app, key: str) -> asyncio.Task:
+    """Start a refresh of a cache key, or join the one already running"""
+    task = cache_refreshes.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_run_cache_refresh(app, key))
+        cache_refreshes[key] = task
+        task.add_done_callback(lambda t: _finish_cache_refresh(key, t))
+    return task
+
+async def _run_cache_refresh(app, key: str) -> Dict:
+    source = CACHE_SOURCES[key]
+    try:
+        if not is_leader():
+            # Followers never call Discord; the leader refreshes and shares the result
+            return await shared_cache.refresh(key)
+        data = await source['fetch'](app)
+    except Exception:
+        # Keep serving what we have, or the fallback, flagged stale and only briefly
+        data = cache[key]['data']
+        if data is None and source['fallback']:
+            data = source['fallback']()
+        if data is not None:
+            store_stale(key, data)
+        raise
+    store_cache(key, data)
+    return data
+
+def _finish_cache_refresh(key: str, task: asyncio.Task):
+    cache_refreshes.pop(key, None)
+    if task.cancelled():
+        return
+    if task.exception():
+        cache_refreshes_total.inc((key, 'error'))
+        logger.error(f"Error refreshing cache '{key}': {task.exception()}")
+    else:
+        cache_refreshes_total.inc((key, 'ok'))
+
+async def get_cached(app, key: str) -> Dict:
+    """Get a cache entry, serving stale entries while a single refresh runs"""
+    if not is_leader():
+        shared_cache.pull()
+    entry = cache[key]
     current_time = time.time()
     
-    if cache['channels']['data'] and cache['channels']['expires'] > current_time:
-        return web.json_response(cache['channels']['data'])
+    if entry['data'] and entry['expires'] > current_time:
+        cache_lookups.inc((key, 'hit'))
+        return entry
     
-    async with aiohttp.ClientSession() as session:
-        channels = await get_discord_channels(session)
+    task = refresh_cache(app, key)
     
-    cache['channels'] = {
-        'data': channels,
-        'expires': current_time + 300  # Cache for 5 minutes
-    }
+    # Stale-while-revalidate: answer now, the refresh completes in the background
+    if entry['data'] and entry['expires'] + CACHE_STALE_WINDOW > current_time:
+        cache_lookups.inc((key, 'stale'))
+        return entry
     
-    return web.json_response(channels)
+    cache_lookups.inc((key, 'miss'))
+    fallback = CACHE_SOURCES[key]['fallback']
+    try:
+        # Shield so a disconnecting client does not cancel the refresh for other waiters,
+        # and with a fallback to offer, do not hold the request while Discord is slow
+        await asyncio.wait_for(asyncio.shield(task), CACHE_MISS_WAIT if fallback else None)
+    except Exception:
+        if cache[key]['data'] is None and not task.done() and fallback:
+            store_stale(key, fallback())  # the refresh replaces it when it lands
+        if cache[key]['data'] is None:
+            raise
+    return cache[key]
 
-async def api_moderators(request):
-    """Get server moderators"""
+async def cached_response(request, key: str) -> web.Response:
+    """Serve a cache key's pre-encoded JSON"""
+    entry = await get_cached(request.app, key)
+    return payload_response(request, entry['payload'], CACHE_SOURCES[key]['max_age'])
+
+# Cache snapshots: synced entries are saved to disk so a restart can serve
+# them (as stale) immediately instead of every first visitor waiting on Discord
+
+def write_json_atomic(path: str, data):
+    """Replace a JSON file so readers see the old or the new version, never half of one
+    
+    Every write gets its own temp file, so workers saving the same file at
+    once each move in a complete copy.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix=f'.{os.path.basename(path)}.')
+    try:
+        # mkstemp makes the file private; keep the mode the file already had
+        try:
+            os.fchmod(fd, stat.S_IMODE(os.stat(path).st_mode))
+        except FileNotFoundError:
+            os.fchmod(fd, 0o644)
+        with open(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+def write_cache_snapshot(path: str, entries: Dict):
+    write_json_atomic(path, {'saved_at': time.time(), 'entries': entries})
+
+def read_cache_snapshot(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)['entries']
+    except FileNotFoundError:
+        return {}
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable cache snapshot {path}: {e}")
+        return {}
+
+def read_invite_seed(path: str) -> Optional[Dict]:
+    """invite_stats from a saved Discord invite response"""
+    try:
+        with open(path) as f:
+            invite = json.load(f)
+        guild = invite['guild']
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return {
+        'data': {
+            'guild': {
+                'name': guild.get('name', 'Jenna Ortega Fan Server'),
+                'icon': guild.get('icon'),
+                'member_count': invite.get('approximate_member_count', 0),
+                'presence_count': invite.get('approximate_presence_count', 0)
+            },
+            'fetched_at': invite.get('fetched_at', 0),
+            'cached': True
+        },
+        'synced_at': invite.get('fetched_at', 0)
+    }
+
+async def save_cache_snapshot(app):
+    """Write synced cache entries to CACHE_SNAPSHOT atomically"""
+    entries = {
+        key: {'data': entry['data'], 'synced_at': entry['synced_at']}
+        for key, entry in cache.items()
+        if entry['data'] is not None and entry.get('synced_at')
+    }
+    if entries:
+        await asyncio.get_running_loop().run_in_executor(None, write_cache_snapshot, CACHE_SNAPSHOT, entries)
+
+async def load_cache_snapshot():
+    """Fill the cache from the last snapshot, already expired so the first request refreshes it"""
+    loop = asyncio.get_running_loop()
+    entries = await loop.run_in_executor(None, read_cache_snapshot, CACHE_SNAPSHOT)
+    if 'invite_stats' not in entries:
+        seed = await loop.run_in_executor(None, read_invite_seed, INVITE_SEED)
+        if seed:
+            entries['invite_stats'] = seed
+    
     current_time = time.time()
+    for key, saved in entries.items():
+        if key not in CACHE_SOURCES:
+            continue
+        data = saved['data']
+        if key == 'invite_stats':
+            data = {**data, 'cached': True}
+        store_cache(key, data, synced=False)
+        cache[key]['expires'] = current_time
+        cache[key]['synced_at'] = saved['synced_at']
+    if entries:
+        logger.info(f"Warm start: loaded {', '.join(sorted(k for k in entries if k in CACHE_SOURCES))} from disk")
+
+# Shared cache for pre-fork workers (see run_workers): the leader publishes
+# its entries, pre-encoded payloads included, into a memory-mapped file that
+# every follower maps. A follower copies them in when the generation moves
+# and asks the leader for a refresh instead of calling Discord itself.
+
+class SharedCache:
+    """Cache entries shared between worker processes through a memory-mapped file
     
-    if cache['moderators']['data'] and cache['moderators']['expires'] > current_time:
-        return web.json_response(cache['moderators']['data'])
+    Layout: a generation and body length, one refresh request counter per
+    cache key, then the pickled entries. The generation is odd while the
+    leader writes, so a follower never keeps a torn copy.
+    """
     
-    async with aiohttp.ClientSession() as session:
-        moderators = await get_discord_moderators(session)
+    HEADER = struct.Struct('<QQ')
+    COUNTER = struct.Struct('<Q')
+    MAX_KEYS = 32
+    DATA_OFFSET = HEADER.size + COUNTER.size * MAX_KEYS
     
-    cache['moderators'] = {
-        'data': moderators,
-        'expires': current_time + 600  # Cache for 10 minutes
-    }
+    def __init__(self, path: str, leader: bool):
+        with open(path, 'r+b') as f:
+            self.map = mmap.mmap(f.fileno(), 0)
+        self.leader = leader
+        self.keys = list(CACHE_SOURCES)
+        self.generation = 0  # last generation published or copied in
+        self.requests = [self.requested(i) for i in range(len(self.keys))]  # counters the leader has seen
+        self.publishing = False
     
-    return web.json_response(moderators)
-
-async def api_gallery(request):
-    """Get gallery images"""
-    current_time = time.time()
+    def requested(self, index: int) -> int:
+        return self.COUNTER.unpack_from(self.map, self.HEADER.size + self.COUNTER.size * index)[0]
+    
+    def schedule_publish(self):
+        """Publish once at the end of this loop iteration, however many keys changed"""
+        if not self.publishing:
+            self.publishing = True
+            asyncio.get_running_loop().call_soon(self.publish)
     
-    if cache['gallery']['data'] and cache['gallery']['expires'] > current_time:
-        return web.json_response(cache['gallery']['data'])
+    def publish(self):
+        self.publishing = False
+        entries = {
+            key: {field: entry.get(field) for field in ('data', 'payload', 'expires', 'synced_at')}
+            for key, entry in cache.items()
+            if entry['data'] is not None
+        }
+        body = pickle.dumps(entries, pickle.HIGHEST_PROTOCOL)
+        if self.DATA_OFFSET + len(body) > len(self.map):
+            logger.error(f"Shared cache needs {len(body)} bytes, more than SHARED_CACHE_SIZE; followers keep the last copy")
+            return
+        
+        generation = self.HEADER.unpack_from(self.map, 0)[0]
+        if generation % 2 == 0:
+            generation += 1  # odd already if a previous leader died mid-write
+        self.HEADER.pack_into(self.map, 0, generation, 0)
+        self.map[self.DATA_OFFSET:self.DATA_OFFSET + len(body)] = body
+        self.HEADER.pack_into(self.map, 0, generation + 1, len(body))
+        self.generation = generation + 1
     
-    # Add some random new images for variety
-    import random
-    base_url = "https://images.unsplash.com/photo-"
-    image_ids = ["1517841905240-472988babdf9", "1506794778202-cad84cf45f1d", "1494790108755-2616b612b786", "1534528741775-53994a69daeb", "1544005313-94ddf0286df2"]
+    def pull(self) -> bool:
+        """Copy in a newer published cache; False if there is none yet"""
+        generation, length = self.HEADER.unpack_from(self.map, 0)
+        if generation == self.generation or generation % 2:
+            return False
+        body = self.map[self.DATA_OFFSET:self.DATA_OFFSET + length]
+        if self.HEADER.unpack_from(self.map, 0)[0] != generation:
+            return False  # rewritten while we copied; the next pull gets it
+        self.generation = generation
+        for key, entry in pickle.loads(body).items():
+            current = cache.get(key)
+            if current is not None and (current['expires'], current.get('synced_at')) != (entry['expires'], entry['synced_at']):
+                set_cache_entry(key, entry)
+        return True
     
-    new_gallery = GALLERY_DATA.copy()
-    new_gallery['images'] = [
-        {
-            "url": f"https://images.unsplash.com/{random.choice(image_ids)}?w=400&h=400&fit=crop",
-            "uploader": f"fan_{random.randint(100, 999)}",
-            "uploaded_at": datetime.now().isoformat()
+    async def refresh(self, key: str) -> Dict:
+        """Ask the leader to refresh a key and wait for the copy it publishes"""
+        index = self.keys.index(key)
+        offset = self.HEADER.size + self.COUNTER.size * index
+        self.COUNTER.pack_into(self.map, offset, self.requested(index) + 1)
+        expires = cache[key]['expires']
+        deadline = time.monotonic() + SHARED_CACHE_WAIT
+        while time.monotonic() < deadline:
+            self.pull()
+            if cache[key]['data'] is not None and cache[key]['expires'] > expires:
+                return cache[key]['data']
+            await asyncio.sleep(0.05)
+        raise TimeoutError(f"Leader did not refresh '{key}' within {SHARED_CACHE_WAIT}s")
+    
+    def refresh_requests(self) -> List[str]:
+        """Keys followers asked the leader to refresh since the last call"""
+        keys = []
+        for index, key in enumerate(self.keys):
+            count = self.requested(index)
+            if count != self.requests[index]:
+                self.requests[index] = count
+                keys.append(key)
+        return keys
+
+def is_leader() -> bool:
+    """False only in a follower worker, which never refreshes from Discord itself"""
+    return shared_cache is None or shared_cache.leader
+
+def share_cache():
+    """Publish the cache to the followers soon; only the leader publishes"""
+    if shared_cache is not None and shared_cache.leader:
+        shared_cache.schedule_publish()
+
+async def pull_shared_cache(app):
+    """Follower job: pick up new entries even with no requests coming in, for /api/stream"""
+    shared_cache.pull()
+
+async def serve_refresh_requests(app):
+    """Leader job: refresh the keys followers found expired"""
+    for key in shared_cache.refresh_requests():
+        refresh_cache(app, key)
+
+# Live stats stream
+
+def sse_event(event: str, data: bytes) -> bytes:
+    """Encode one Server-Sent Events message"""
+    return b'event: ' + event.encode() + b'\ndata: ' + data + b'\n\n'
+
+class Subscriber:
+    """One /api/stream client: a bounded queue of encoded events"""
+    __slots__ = ('queue', 'dropped')
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(size)
+        self.dropped = False
+
+class StatsStream:
+    """Fan out pre-encoded SSE events to every subscriber
+
+    Each event is encoded once and queued per client. A client whose queue
+    is full is too slow to keep up and is disconnected instead of buffering.
+    """
+
+    def __init__(self, queue_size: int = STREAM_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers: Set[Subscriber] = set()
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, event: bytes):
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                logger.info("Dropping slow /api/stream client")
+                self.drop(subscriber)
+
+    def drop(self, subscriber: Subscriber):
+        """Disconnect a subscriber: empty its queue and wake it with None"""
+        self.subscribers.discard(subscriber)
+        subscriber.dropped = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+
+    def close(self):
+        for subscriber in list(self.subscribers):
+            self.drop(subscriber)
+
+stats_stream = StatsStream()
+
+async def close_streams(app):
+    """End open /api/stream responses so shutdown does not wait on them"""
+    stats_stream.close()
+
+# Background scheduler
+
+def schedule_job(app, name: str, interval: float, job: Callable[[web.Application], Awaitable]):
+    """Register job(app) to run every interval seconds once the app starts"""
+    app[SCHEDULED_JOBS].append({'name': name, 'interval': interval, 'job': job})
+
+def _next_delay(interval: float, failures: int) -> float:
+    if failures:
+        interval = min(SCHEDULER_BACKOFF_BASE * 2 ** (failures - 1), SCHEDULER_MAX_BACKOFF)
+    # Jitter only ever shortens the wait, so refresh-ahead jobs never run late
+    return interval * (1 - random.uniform(0, SCHEDULER_JITTER))
+
+async def _run_job(app, spec: Dict):
+    failures = 0
+    while True:
+        try:
+            await spec['job'](app)
+            failures = 0
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            failures += 1
+            logger.warning(f"Scheduled job '{spec['name']}' failed ({failures} in a row): {e}")
+        delay = _next_delay(spec['interval'], failures)
+        if failures:
+            logger.info(f"Retrying '{spec['name']}' in {delay:.0f}s")
+        await asyncio.sleep(delay)
+
+async def start_scheduler(app):
+    """Start every registered job; each runs once immediately"""
+    app[SCHEDULER_TASKS] = [asyncio.create_task(_run_job(app, spec)) for spec in app[SCHEDULED_JOBS]]
+
+async def stop_scheduler(app):
+    """Cancel scheduled jobs before the Discord client closes"""
+    for task in app[SCHEDULER_TASKS]:
+        task.cancel()
+    await asyncio.gather(*app[SCHEDULER_TASKS], return_exceptions=True)
+
+async def refresh_job(app, key: str):
+    """Scheduled refresh; gateway-fed keys only poll for a periodic resync"""
+    gateway = app.get(DISCORD_GATEWAY)
+    entry = cache[key]
+    if (key in GATEWAY_KEYS and gateway and gateway.live and entry['data']
+            and time.time() - entry.get('synced_at', 0) < GATEWAY_RESYNC_INTERVAL):
+        entry['expires'] = time.time() + CACHE_SOURCES[key]['ttl']
+        share_cache()
+        return
+    await refresh_cache(app, key)
+
+def schedule_cache_refreshes(app):
+    """Keep every cache key warm by refreshing it before it expires"""
+    for key, source in CACHE_SOURCES.items():
+        schedule_job(app, f'refresh:{key}', source['ttl'] * CACHE_REFRESH_AHEAD,
+                     lambda app, key=key: refresh_job(app, key))
+
+# Discord Gateway
+
+class GatewayClient:
+    """Discord Gateway connection that applies guild events to the cache
+
+    REST polling remains the fallback: while the gateway is live the
+    scheduler only resyncs GATEWAY_KEYS every GATEWAY_RESYNC_INTERVAL.
+    """
+
+    # Authentication, sharding and intent errors that reconnecting will not fix
+    FATAL_CLOSE_CODES = {4004, 4010, 4011, 4012, 4013, 4014}
+
+    def __init__(self, app, url: str = DISCORD_GATEWAY_URL, intents: int = DISCORD_GATEWAY_INTENTS):
+        self.app = app
+        self.url = url
+        self.intents = intents
+        self.live = False
+        self.ready_seen = False
+        self.acked = True
+        self.seq: Optional[int] = None
+        self.session_id: Optional[str] = None
+        self.resume_url: Optional[str] = None
+        self.roles: Dict[str, Dict] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.handlers = {
+            'READY': self.on_ready,
+            'RESUMED': self.on_resumed,
+            'GUILD_CREATE': self.on_guild_create,
+            'CHANNEL_CREATE': self.on_channel_upsert,
+            'CHANNEL_UPDATE': self.on_channel_upsert,
+            'CHANNEL_DELETE': self.on_channel_delete,
+            'GUILD_ROLE_CREATE': self.on_role_upsert,
+            'GUILD_ROLE_UPDATE': self.on_role_upsert,
+            'GUILD_ROLE_DELETE': self.on_role_delete,
+            'GUILD_MEMBER_ADD': self.on_member_add,
+            'GUILD_MEMBER_UPDATE': self.on_member_update,
+            'GUILD_MEMBER_REMOVE': self.on_member_remove
         }
-        for _ in range(12)  # 12 images for 3x4 grid
-    ]
+
+    async def run(self):
+        """Stay connected, reconnecting with backoff until cancelled"""
+        failures = 0
+        while True:
+            close_code = None
+            try:
+                close_code = await self._connect()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Gateway connection failed: {e}")
+            
+            if close_code in self.FATAL_CLOSE_CODES:
+                logger.error(f"Gateway closed with code {close_code}; staying on REST polling")
+                return
+            failures = 1 if self.ready_seen else failures + 1
+            delay = min(SCHEDULER_BACKOFF_BASE * 2 ** (failures - 1), SCHEDULER_MAX_BACKOFF)
+            logger.info(f"Gateway disconnected ({close_code}), reconnecting in {delay}s")
+            await asyncio.sleep(delay)
+
+    async def _connect(self) -> Optional[int]:
+        session = self.app[DISCORD_CLIENT].session
+        url = f'{self.resume_url}/?v=10&encoding=json' if self.resume_url and self.session_id else self.url
+        self.ready_seen = False
+        
+        async with session.ws_connect(url, max_msg_size=0) as ws:
+            hello = await ws.receive_json(timeout=DISCORD_TIMEOUT)
+            interval = hello['d']['heartbeat_interval'] / 1000
+            self.acked = True
+            heartbeat = asyncio.create_task(self._heartbeat(ws, interval))
+            try:
+                await ws.send_json(self._resume() if self.session_id else self._identify())
+                async for msg in ws:
+                    if msg.type != aiohttp.WSMsgType.TEXT:
+                        break
+                    payload = json.loads(msg.data)
+                    if payload.get('s') is not None:
+                        self.seq = payload['s']
+                    
+                    op = payload['op']
+                    if op == 0:
+                        self._dispatch(payload['t'], payload['d'])
+                    elif op == 1:
+                        await ws.send_json({'op': 1, 'd': self.seq})
+                    elif op == 11:
+                        self.acked = True
+                    elif op == 7:
+                        break  # Discord asked us to reconnect and resume
+                    elif op == 9:
+                        if not payload['d']:
+                            self.session_id = self.seq = None
+                        break
+            finally:
+                heartbeat.cancel()
+                self.live = False
+            return ws.close_code
+
+    async def _heartbeat(self, ws, interval: float):
+        await asyncio.sleep(interval * random.random())
+        while True:
+            if not self.acked:
+                logger.warning("Gateway heartbeat not acknowledged, reconnecting")
+                await ws.close(code=4000)
+                return
+            self.acked = False
+            await ws.send_json({'op': 1, 'd': self.seq})
+            await asyncio.sleep(interval)
+
+    def _identify(self) -> Dict:
+        return {'op': 2, 'd': {
+            'token': DISCORD_BOT_TOKEN,
+            'intents': self.intents,
+            'properties': {'os': 'linux', 'browser': 'jenna-server', 'device': 'jenna-server'}
+        }}
+
+    def _resume(self) -> Dict:
+        return {'op': 6, 'd': {'token': DISCORD_BOT_TOKEN, 'session_id': self.session_id, 'seq': self.seq}}
+
+    def _dispatch(self, event: str, data: Dict):
+        handler = self.handlers.get(event)
+        if handler is None:
+            return
+        if event not in ('READY', 'RESUMED') and data.get('guild_id', data.get('id')) != GUILD_ID:
+            return
+        try:
+            handler(data)
+        except Exception as e:
+            logger.error(f"Error applying gateway event {event}: {e}")
+
+    def on_ready(self, data: Dict):
+        self.session_id = data['session_id']
+        self.resume_url = data.get('resume_gateway_url')
+        self.live = self.ready_seen = True
+        logger.info("Gateway connected")
+
+    def on_resumed(self, data: Dict):
+        self.live = self.ready_seen = True
+        logger.info("Gateway session resumed")
+
+    def on_guild_create(self, data: Dict):
+        store_cache('channels', {'channels': format_channels(data.get('channels', [])), 'fetched_at': int(time.time())})
+        self.roles = {role['id']: role for role in data.get('roles', [])}
+        self._roles_changed()
+        if 'member_count' in data:
+            self._set_member_count(lambda count: data['member_count'])
+
+    def on_channel_upsert(self, data: Dict):
+        entry = format_channel(data)
+        
+        def apply(channels):
+            for i, existing in enumerate(channels):
+                if existing.get('id') == data['id']:
+                    return channels[:i] + ([entry] if entry else []) + channels[i + 1:]
+            return channels + [entry] if entry else channels
+        self._update_channels(apply)
+
+    def on_channel_delete(self, data: Dict):
+        self._update_channels(lambda channels: [c for c in channels if c.get('id') != data['id']])
+
+    def on_role_upsert(self, data: Dict):
+        self.roles[data['role']['id']] = data['role']
+        self._roles_changed()
+
+    def on_role_delete(self, data: Dict):
+        self.roles.pop(data['role_id'], None)
+        self._roles_changed()
+
+    def on_member_add(self, data: Dict):
+        member_store.upsert(data)
+        self._set_member_count(lambda count: count + 1)
+        self._publish_moderators()
+
+    def on_member_update(self, data: Dict):
+        member_store.upsert(data)
+        self._publish_moderators()
+
+    def on_member_remove(self, data: Dict):
+        member_store.remove(int(data['user']['id']))
+        self._set_member_count(lambda count: max(0, count - 1))
+        self._publish_moderators()
+
+    def _update_channels(self, apply: Callable[[List[Dict]], List[Dict]]):
+        # Deltas only make sense on a real channel list, not the demo fallback
+        entry = cache['channels']
+        if entry['data'] and entry.get('synced_at'):
+            store_cache('channels', {'channels': apply(entry['data']['channels']), 'fetched_at': int(time.time())}, synced=False)
+
+    def _roles_changed(self):
+        if member_store.set_roles(list(self.roles.values())):
+            # Holders of a newly ranked role are only found by a full member sync
+            refresh_cache(self.app, 'moderators')
+        self._publish_moderators()
+
+    def _publish_moderators(self):
+        if member_store.synced:
+            store_cache('moderators', {'moderators': member_store.moderators(10), 'fetched_at': int(time.time())}, synced=False)
+
+    def _set_member_count(self, update: Callable[[int], int]):
+        data = cache['invite_stats']['data']
+        if data and not data.get('cached'):
+            guild = dict(data['guild'], member_count=update(data['guild']['member_count']))
+            store_cache('invite_stats', dict(data, guild=guild), synced=False)
+
+DISCORD_GATEWAY = web.AppKey('discord_gateway', GatewayClient)
+
+async def start_gateway(app):
+    """Connect to the Discord Gateway in the background"""
+    gateway = app[DISCORD_GATEWAY]
+    gateway.task = asyncio.create_task(gateway.run())
+
+async def stop_gateway(app):
+    """Close the Gateway connection before the Discord client closes"""
+    task = app[DISCORD_GATEWAY].task
+    if task:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+# Join events: counted in memory on the request path, written to JOIN_LOG
+# in batches by a background flush
+
+class CounterRing:
+    """Event counts per fixed-size time bucket, keeping the most recent slots"""
     
-    cache['gallery'] = {
-        'data': new_gallery,
-        'expires': current_time + 120  # Cache for 2 minutes
-    }
+    __slots__ = ('width', 'counts', 'buckets')
+    
+    def __init__(self, width: int, slots: int):
+        self.width = width
+        self.counts = array('I', bytes(4 * slots))
+        self.buckets = array('q', [-1]) * slots  # bucket number each slot currently holds
     
-    return web.json_response(new_gallery)
+    def add(self, ts: float, n: int = 1):
+        bucket = int(ts // self.width)
+        slot = bucket % len(self.counts)
+        if self.buckets[slot] != bucket:
+            if bucket < self.buckets[slot]:
+                return  # older than anything the ring still holds
+            self.buckets[slot] = bucket
+            self.counts[slot] = 0
+        self.counts[slot] += n
+    
+    def series(self, now: float, n: int) -> List[Dict]:
+        """The last n buckets up to now, oldest first"""
+        n = min(n, len(self.counts))
+        latest = int(now // self.width)
+        points = []
+        for bucket in range(latest - n + 1, latest + 1):
+            slot = bucket % len(self.counts)
+            count = self.counts[slot] if self.buckets[slot] == bucket else 0
+            points.append({'start': datetime.fromtimestamp(bucket * self.width, timezone.utc).isoformat(), 'count': count})
+        return points
 
-async def api_jenna(request):
-    """Get Jenna images"""
-    current_time = time.time()
+class JoinRecorder:
+    """Write-behind join log with per-minute, hour and day rollups
+    
+    With shared set, other workers append to the same log, so the rollups
+    are counted from the log as it grows instead of on the request path.
+    """
+    
+    def __init__(self, path: str, shared: bool = False):
+        self.path = path
+        self.shared = shared
+        self.offset = 0  # bytes of the log already counted
+        self.buffer: List[str] = []
+        self.dropped = 0
+        self.total = 0
+        self.minutes = CounterRing(60, 24 * 60)
+        self.hours = CounterRing(3600, 30 * 24)
+        self.days = CounterRing(86400, 366)
+        self.flushing: Optional[asyncio.Task] = None  # early flush started by record()
+        self.writing: Optional[asyncio.Future] = None  # the executor write in progress
+        self.lock = asyncio.Lock()
+    
+    def count(self, ts: float):
+        self.total += 1
+        self.minutes.add(ts)
+        self.hours.add(ts)
+        self.days.add(ts)
+    
+    def record(self, page: str):
+        """Count a join and queue it for the log; never touches the disk"""
+        ts = time.time()
+        if not self.shared:
+            self.count(ts)
+        if len(self.buffer) >= JOIN_BUFFER_MAX:
+            self.dropped += 1
+            return
+        self.buffer.append(json.dumps({'ts': round(ts, 3), 'page': page}) + '\n')
+        if len(self.buffer) >= JOIN_FLUSH_BATCH and self.flushing is None:
+            self.flushing = asyncio.ensure_future(self.flush())
+            self.flushing.add_done_callback(self._flush_done)
     
-    if cache['jenna']['data'] and cache['jenna']['expires'] > current_time:
-        return web.json_response(cache['jenna']['data'])
+    def _flush_done(self, task: asyncio.Task):
+        self.flushing = None
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error flushing join log: {task.exception()}")
     
-    # Add some random new images for variety
-    import random
-    base_url = "https://images.unsplash.com/photo-"
-    image_ids = ["1534528741775-53994a69daeb", "1544005313-94ddf0286df2", "1487412720507-e7ab37603c6f", "1507003211169-0a1dd7228f2d", "1472041578835-bc7b1b325718", "1511791071-1511791071-7c440d765e4a"]
+    def append_lines(self, lines: List[str]):
+        # A single O_APPEND write, so batches from several workers never interleave
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, ''.join(lines).encode('utf-8'))
+        finally:
+            os.close(fd)
     
-    new_jenna = JENNA_DATA.copy()
-    new_jenna['images'] = [
-        {
-            "url": f"https://images.unsplash.com/{random.choice(image_ids)}?w=400&h=400&fit=crop",
-            "alt": random.choice(["Red Carpet", "Casual", "Event", "Behind Scenes", "Portrait", "Candid"])
+    async def flush(self):
+        """Append buffered events to the log in one write, one write at a time"""
+        async with self.lock:
+            # A write whose flush was cancelled still finishes in its thread
+            if self.writing is not None and not self.writing.done():
+                await asyncio.wait([self.writing])
+            if not self.buffer:
+                return
+            lines, self.buffer = self.buffer, []
+            self.writing = asyncio.get_running_loop().run_in_executor(None, self.append_lines, lines)
+            try:
+                await asyncio.shield(self.writing)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Put them back in front of anything recorded meanwhile; retried next flush
+                self.buffer[:0] = lines[:max(0, JOIN_BUFFER_MAX - len(self.buffer))]
+                raise
+    
+    def read_new(self) -> List[float]:
+        """Timestamps of the complete lines appended to the log since the last read"""
+        try:
+            f = open(self.path, 'rb')
+        except FileNotFoundError:
+            return []
+        with f:
+            f.seek(self.offset)
+            data = f.read()
+        end = data.rfind(b'\n') + 1  # a line still being written is read next time
+        self.offset += end
+        timestamps = []
+        for line in data[:end].splitlines():
+            try:
+                timestamps.append(json.loads(line)['ts'])
+            except (ValueError, KeyError, TypeError):
+                continue  # a torn line from a crash
+        return timestamps
+    
+    async def catch_up(self) -> int:
+        """Count what is new in the log: everything after a restart, other workers' joins after that"""
+        for ts in await asyncio.get_running_loop().run_in_executor(None, self.read_new):
+            self.count(ts)
+        return self.total
+    
+    def stats(self) -> Dict:
+        now = time.time()
+        return {
+            'total': self.total,
+            'last_hour': sum(point['count'] for point in self.minutes.series(now, 60)),
+            'last_day': sum(point['count'] for point in self.hours.series(now, 24)),
+            'minutes': self.minutes.series(now, 60),
+            'hours': self.hours.series(now, 48),
+            'days': self.days.series(now, 30),
+            'pending_writes': len(self.buffer),
+            'dropped': self.dropped
         }
-        for _ in range(16)  # 16 images for 4x4 grid
+
+JOIN_RECORDER = web.AppKey('join_recorder', JoinRecorder)
+
+async def start_join_recorder(app):
+    recorder = JoinRecorder(JOIN_LOG, shared=shared_cache is not None)
+    total = await recorder.catch_up()
+    logger.info(f"Join log: {total} past joins loaded from {JOIN_LOG}")
+    app[JOIN_RECORDER] = recorder
+
+async def stop_join_recorder(app):
+    recorder = app[JOIN_RECORDER]
+    if recorder.flushing is not None:
+        await asyncio.gather(recorder.flushing, return_exceptions=True)
+    await recorder.flush()
+
+async def flush_joins(app):
+    recorder = app[JOIN_RECORDER]
+    await recorder.flush()
+    if recorder.shared:
+        await recorder.catch_up()
+
+# Site settings: settings.json and channels.json, held in memory. Reads are
+# served from pre-encoded payloads; edits are written back behind them.
+
+def read_json_file(path: str, default):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except ValueError as e:
+        logger.warning(f"Ignoring unreadable {path}: {e}")
+        return default
+
+def file_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """Exclusive lock shared by every worker process, held while the block runs"""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+def merge_channels(channels: List[Dict], overrides: List[Dict]) -> List[Dict]:
+    """Channels with overrides applied by name; hidden ones dropped, added ones appended
+    
+    An override without 'added' only restyles the channel of the same name,
+    so entries for channels that no longer exist are ignored.
+    """
+    by_name = {override['name']: override for override in overrides}
+    merged = []
+    for channel in channels:
+        override = by_name.pop(channel['name'], None)
+        if override is None:
+            merged.append(channel)
+        elif not override.get('hidden'):
+            merged.append({**channel, **{k: v for k, v in override.items() if k != 'added'}})
+    merged += [
+        {k: v for k, v in override.items() if k != 'added'}
+        for override in by_name.values() if override.get('added') and not override.get('hidden')
     ]
+    return merged
+
+class SiteStore:
+    """Site settings and channel overrides, kept in memory and written behind
     
-    cache['jenna'] = {
-        'data': new_jenna,
-        'expires': current_time + 300  # Cache for 5 minutes
-    }
+    An edit changes memory at once and is queued as a function of the
+    document. Edits arriving within SITE_WRITE_DELAY share one write, which
+    re-reads the file under a lock, replays them onto it and replaces it
+    atomically; edits saved meanwhile by other workers are kept.
+    """
+    
+    def __init__(self, settings_path: str = SITE_SETTINGS, channels_path: str = SITE_CHANNELS):
+        self.paths = {'settings': settings_path, 'channels': channels_path}
+        self.settings: Dict = {}
+        self.channels: List[Dict] = []
+        self.mtimes: Dict[str, Optional[int]] = {}  # as last read or written
+        self.pending: Dict[str, List[Callable]] = {}  # edits not yet saved, oldest first
+        self.writer: Optional[asyncio.Task] = None
+        self.version = 0  # bumped by every change, for the channel payload memo
+        self.site: Optional[Dict] = None
+        self.channels_view = (None, -1, None)  # source ETag, version, payload
+    
+    @staticmethod
+    def read(name: str, path: str):
+        """A file's document, with anything malformed dropped"""
+        if name == 'settings':
+            settings = read_json_file(path, {})
+            return settings if isinstance(settings, dict) else {}
+        channels = read_json_file(path, [])
+        if not isinstance(channels, list):
+            return []
+        return [c for c in channels if isinstance(c, dict) and c.get('name')]
+    
+    def load(self, name: Optional[str] = None):
+        """Read the files (or just one) into memory; runs in an executor"""
+        for file in ([name] if name else list(self.paths)):
+            path = self.paths[file]
+            mtime = file_mtime(path)
+            setattr(self, file, self.read(file, path))
+            self.mtimes[file] = mtime
+        self.changed()
+    
+    def changed(self):
+        self.version += 1
+        self.site = None
+    
+    def site_payload(self) -> Dict:
+        if self.site is None:
+            self.site = encode_payload(self.settings)
+        return self.site
+    
+    def channels_payload(self, entry: Dict) -> Dict:
+        """The channels cache entry with overrides applied, encoded once per change of either"""
+        source_etag = entry['payload']['identity'][1]
+        cached_etag, version, payload = self.channels_view
+        if cached_etag != source_etag or version != self.version:
+            if self.channels:
+                data = entry['data']
+                payload = encode_payload({**data, 'channels': merge_channels(data['channels'], self.channels)})
+            else:
+                payload = entry['payload']
+            self.channels_view = (source_etag, self.version, payload)
+        return payload
     
-    return web.json_response(new_jenna)
+    def edit(self, name: str, change: Callable):
+        """Apply change to a document in memory now and to its file on the next write"""
+        setattr(self, name, change(getattr(self, name)))
+        self.pending.setdefault(name, []).append(change)
+        self.changed()
+        if self.writer is None:
+            self.writer = asyncio.ensure_future(self._write_behind())
+    
+    def set_setting(self, key: str, value):
+        self.edit('settings', lambda settings: {**settings, key: value})
+    
+    def add_channel(self, channel: Dict) -> Dict:
+        """Add a channel, or replace the one with the same name"""
+        name = channel['name'].strip()
+        override = {
+            'name': name if name.startswith('#') else f'#{name}',
+            'emoji': str(channel.get('emoji') or ''),
+            'url': str(channel.get('url') or ''),
+            'desc': str(channel.get('desc') or ''),
+            'added': True
+        }
+        self.edit('channels', lambda channels: [c for c in channels if c['name'] != override['name']] + [override])
+        return override
+    
+    def delete_channel(self, name: str, source_names: Set[str]) -> bool:
+        """Remove an added channel, or hide one that comes from Discord; False if unknown"""
+        hidden = any(c['name'] == name and c.get('hidden') for c in self.channels)
+        added = any(c['name'] == name and not c.get('hidden') for c in self.channels)
+        if not added and (hidden or name not in source_names):
+            return False
+        hide = [{'name': name, 'hidden': True}] if name in source_names else []
+        self.edit('channels', lambda channels: [c for c in channels if c['name'] != name] + hide)
+        return True
+    
+    async def _write_behind(self):
+        loop = asyncio.get_running_loop()
+        try:
+            await asyncio.sleep(SITE_WRITE_DELAY)
+            while self.pending:
+                batch, self.pending = self.pending, {}
+                try:
+                    saved = await loop.run_in_executor(None, self._write, batch)
+                except OSError as e:
+                    logger.error(f"Error saving site settings: {e}")
+                    for name, changes in batch.items():
+                        self.pending[name] = changes + self.pending.get(name, [])
+                    await asyncio.sleep(SITE_WRITE_DELAY * 10)
+                    continue
+                # The saved file may hold other workers' edits; replay ours made since on top
+                for name, (document, mtime) in saved.items():
+                    for change in self.pending.get(name, []):
+                        document = change(document)
+                    setattr(self, name, document)
+                    self.mtimes[name] = mtime
+                self.changed()
+        finally:
+            self.writer = None
+    
+    def _write(self, batch: Dict[str, List[Callable]]) -> Dict[str, Tuple]:
+        """Replay edits onto each file as it is now; the saved documents and their mtimes"""
+        saved = {}
+        for name, changes in batch.items():
+            path = self.paths[name]
+            with file_lock(f'{path}.lock'):
+                document = self.read(name, path)
+                for change in changes:
+                    document = change(document)
+                write_json_atomic(path, document)
+                saved[name] = (document, file_mtime(path))
+        return saved
+    
+    def changed_files(self) -> List[str]:
+        """Files another worker has rewritten since we last read or wrote them"""
+        return [
+            name for name, path in self.paths.items()
+            if name not in self.pending and self.writer is None and file_mtime(path) != self.mtimes.get(name)
+        ]
+
+SITE_STORE = web.AppKey('site_store', SiteStore)
+
+async def start_site_store(app):
+    store = SiteStore()
+    await asyncio.get_running_loop().run_in_executor(None, store.load)
+    app[SITE_STORE] = store
+
+async def stop_site_store(app):
+    store = app[SITE_STORE]
+    if store.writer is not None:
+        await store.writer
+
+async def reload_site_store(app):
+    """Worker job: pick up edits saved through the other workers"""
+    store = app[SITE_STORE]
+    loop = asyncio.get_running_loop()
+    for name in await loop.run_in_executor(None, store.changed_files):
+        await loop.run_in_executor(None, store.load, name)
+        logger.info(f"Reloaded site {name}, changed by another worker")
+
+# API Routes
+
+async def api_invite(request):
+    """Get invite statistics"""
+    return await cached_response(request, 'invite_stats')
+
+async def api_channels(request):
+    """Get server channels with the site's channel overrides applied"""
+    entry = await get_cached(request.app, 'channels')
+    payload = request.app[SITE_STORE].channels_payload(entry)
+    return payload_response(request, payload, CACHE_SOURCES['channels']['max_age'])
+
+async def api_site(request):
+    """Get site settings: banner and profile picture"""
+    return payload_response(request, request.app[SITE_STORE].site_payload(), SITE_MAX_AGE)
+
+async def api_moderators(request):
+    """Get server moderators"""
+    return await cached_response(request, 'moderators')
+
+async def api_stream(request):
+    """Stream invite statistics as Server-Sent Events"""
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    await response.prepare(request)
+    subscriber = stats_stream.subscribe()
+    
+    try:
+        entry = await get_cached(request.app, 'invite_stats')
+        await response.write(b'retry: 10000\n' + sse_event('invite', entry['payload']['identity'][0]))
+        
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                event = b': keepalive\n\n'
+            if event is None:
+                break
+            await response.write(event)
+    except ConnectionResetError:
+        pass
+    finally:
+        stats_stream.unsubscribe(subscriber)
+    return response
+
+async def feed_response(request, key: str) -> web.Response:
+    """A page of an image feed: ?limit=&cursor= with next_cursor from the previous page
+    
+    The first page is the cache entry; later pages are built from the upload
+    catalog and kept encoded until the feed is next refreshed.
+    """
+    page_size, build_page = FEEDS[key]
+    cursor = request.query.get('cursor') or None
+    try:
+        limit = int(request.query.get('limit', page_size))
+        if cursor:
+            decode_cursor(cursor)
+    except ValueError:
+        return web.json_response({"error": "Invalid limit or cursor"}, status=400)
+    if not 1 <= limit <= FEED_MAX_PAGE_SIZE:
+        return web.json_response({"error": f"limit must be between 1 and {FEED_MAX_PAGE_SIZE}"}, status=400)
+    if cursor is None and limit == page_size:
+        return await cached_response(request, key)
+    
+    page_key = (key, cursor, limit)
+    payload = feed_pages.get(page_key)
+    if payload is None:
+        payload = encode_payload(await build_page(request.app, limit, cursor))
+        feed_pages[page_key] = payload
+        while len(feed_pages) > FEED_PAGE_CACHE:
+            feed_pages.popitem(last=False)
+    else:
+        feed_pages.move_to_end(page_key)
+    return payload_response(request, payload, CACHE_SOURCES[key]['max_age'])
+
+async def api_gallery(request):
+    """Get gallery images, newest first, a page at a time"""
+    return await feed_response(request, 'gallery')
+
+async def api_jenna(request):
+    """Get Jenna images, newest first, a page at a time"""
+    return await feed_response(request, 'jenna')
 
 async def api_join(request):
     """Record a join event"""
     try:
-        # In a real implementation, you'd track this in a database
-        logger.info("Join event recorded")
+        referer = request.headers.get('Referer', '')
+        page = re.sub(r'^[a-z]+://[^/]+', '', referer).split('?', 1)[0][:200] or '/'
+        request.app[JOIN_RECORDER].record(page)
         return web.json_response({"status": "success", "message": "Join recorded"})
     except Exception as e:
         logger.error(f"Error recording join: {e}")
         return web.json_response({"status": "error", "message": str(e)}, status=500)
 
+async def api_join_stats(request):
+    """Join counts per minute, hour and day"""
+    return web.json_response(request.app[JOIN_RECORDER].stats())
+
 # Admin API Routes
 
 async def admin_uploads(request):
-    """Get pending and approved uploads"""
+    """Get pending and approved uploads, a page at a time
+    
+    ?status=pending|approved&cursor=...&limit=... pages through one list;
+    without status the first page of both is returned with their counts.
+    Pending uploads are listed oldest first, approved newest first.
+    """
     try:
-        pending = []
-        approved = []
-        
-        # Check pending uploads
-        pending_dir = os.path.join(UPLOAD_DIR, 'pending')
-        if os.path.exists(pending_dir):
-            for filename in os.listdir(pending_dir):
-                if filename.endswith(('.jpg', '.jpeg', '.png', '.webp')):
-                    pending.append({
-                        'id': filename,
-                        'filename': filename,
-                        'uploader': 'anonymous',
-                        'uploaded_at': datetime.now().isoformat()
-                    })
-        
-        # Check approved uploads
-        approved_dir = os.path.join(UPLOAD_DIR, 'approved')
-        if os.path.exists(approved_dir):
-            for filename in os.listdir(approved_dir):
-                if filename.endswith(('.jpg', '.jpeg', '.png', '.webp')):
-                    approved.append({
-                        'id': filename,
-                        'filename': filename,
-                        'uploader': 'approved_user',
-                        'uploaded_at': datetime.now().isoformat()
-                    })
+        catalog = request.app[UPLOAD_CATALOG_KEY]
+        status = request.query.get('status')
+        try:
+            limit = min(max(int(request.query.get('limit', UPLOAD_PAGE_SIZE)), 1), UPLOAD_MAX_PAGE_SIZE)
+        except ValueError:
+            return web.json_response({"error": "Invalid limit"}, status=400)
+        
+        if status:
+            if status not in UploadCatalog.STATUSES:
+                return web.json_response({"error": "Invalid status"}, status=400)
+            try:
+                items, next_cursor = await catalog.run(
+                    catalog.page, status, limit, request.query.get('cursor'), status == 'approved'
+                )
+            except ValueError:
+                return web.json_response({"error": "Invalid cursor"}, status=400)
+            return web.json_response({'items': items, 'next_cursor': next_cursor})
+        
+        pending, next_pending = await catalog.run(catalog.page, 'pending', limit)
+        approved, next_approved = await catalog.run(catalog.page, 'approved', limit, None, True)
+        counts = await catalog.run(catalog.counts)
         
         return web.json_response({
             'pending': pending,
-            'approved': approved
+            'approved': approved,
+            'counts': counts,
+            'next_cursor': {'pending': next_pending, 'approved': next_approved}
         })
     except Exception as e:
         logger.error(f"Error getting uploads: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
-async def admin_approve(request):
-    """Approve an upload"""
+async def moderate_one(request, action: str):
+    """Approve or reject the upload named by {"id"}"""
     try:
         data = await request.json()
         filename = data.get('id')
         
         if not filename:
             return web.json_response({"error": "No filename provided"}, status=400)
+        if not is_upload_name(filename):
+            return web.json_response({"error": "Invalid filename"}, status=400)
         
-        pending_file = os.path.join(UPLOAD_DIR, 'pending', filename)
-        approved_file = os.path.join(UPLOAD_DIR, 'approved', filename)
-        
-        if os.path.exists(pending_file):
-            import shutil
-            shutil.move(pending_file, approved_file)
-            return web.json_response({"status": "success", "message": "Image approved"})
-        else:
+        result = (await moderate_uploads(request.app, action, [filename]))[filename]
+        if result == 'not_found':
             return web.json_response({"error": "File not found"}, status=404)
+        if result == 'error':
+            return web.json_response({"error": "Could not move the file"}, status=500)
+        return web.json_response({"status": "success", "message": f"Image {result}"})
             
     except Exception as e:
-        logger.error(f"Error approving upload: {e}")
+        logger.error(f"Error moderating upload: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
-async def admin_reject(request):
-    """Reject an upload"""
+async def moderate_batch(request, action: str):
+    """Approve or reject the uploads named by {"ids": [...]}, with a result for each
+    
+    Each id maps to approved/rejected, not_found (no longer pending),
+    invalid or error; counts totals them.
+    """
     try:
         data = await request.json()
-        filename = data.get('id')
+        ids = data.get('ids') if isinstance(data, dict) else None
         
-        if not filename:
-            return web.json_response({"error": "No filename provided"}, status=400)
+        if not isinstance(ids, list) or not ids:
+            return web.json_response({"error": "No ids provided"}, status=400)
+        if len(ids) > MODERATION_MAX_BATCH:
+            return web.json_response({"error": f"At most {MODERATION_MAX_BATCH} ids per batch"}, status=400)
         
-        pending_file = os.path.join(UPLOAD_DIR, 'pending', filename)
+        results: Dict[str, str] = {}
+        filenames = []
+        for upload_id in ids:
+            if not is_upload_name(upload_id):
+                results[str(upload_id)] = 'invalid'
+            elif upload_id not in results:
+                results[upload_id] = 'pending'
+                filenames.append(upload_id)
+        if filenames:
+            results.update(await moderate_uploads(request.app, action, filenames))
         
-        if os.path.exists(pending_file):
-            os.remove(pending_file)
-            return web.json_response({"status": "success", "message": "Image rejected"})
-        else:
-            return web.json_response({"error": "File not found"}, status=404)
+        counts: Dict[str, int] = {}
+        for result in results.values():
+            counts[result] = counts.get(result, 0) + 1
+        return web.json_response({"status": "success", "results": results, "counts": counts})
             
     except Exception as e:
-        logger.error(f"Error rejecting upload: {e}")
+        logger.error(f"Error moderating uploads: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
+async def admin_approve(request):
+    """Approve an upload"""
+    return await moderate_one(request, 'approve')
+
+async def admin_reject(request):
+    """Reject an upload"""
+    return await moderate_one(request, 'reject')
+
+async def admin_approve_batch(request):
+    """Approve many uploads"""
+    return await moderate_batch(request, 'approve')
+
+async def admin_reject_batch(request):
+    """Reject many uploads"""
+    return await moderate_batch(request, 'reject')
+
 async def admin_set_asset(request):
     """Set site banner or PFP"""
     try:
@@ -438,8 +2253,10 @@ async def admin_set_asset(request):
         
         if not asset_type or not url:
             return web.json_response({"error": "Missing type or url"}, status=400)
+        if asset_type not in SITE_ASSETS or not isinstance(url, str):
+            return web.json_response({"error": f"type must be one of {', '.join(SITE_ASSETS)}"}, status=400)
         
-        # In a real implementation, you'd update the site configuration
+        request.app[SITE_STORE].set_setting(asset_type, url)
         logger.info(f"Setting {asset_type} to {url}")
         return web.json_response({"status": "success", "message": f"{asset_type} updated"})
             
@@ -456,11 +2273,16 @@ async def admin_add_jenna(request):
         if not filename:
             return web.json_response({"error": "No filename provided"}, status=400)
         
-        # In a real implementation, you'd add this to the Jenna images database
-        logger.info(f"Adding {filename} to Jenna page")
+        catalog = request.app[UPLOAD_CATALOG_KEY]
+        added = await catalog.run(catalog.add_jenna, filename, str(data.get('alt') or 'Jenna Ortega'))
+        if added is None:
+            return web.json_response({"error": "Approved image not found"}, status=404)
+        if added:
+            logger.info(f"Added {filename} to Jenna page")
+            refresh_cache(request.app, 'jenna')
         return web.json_response({
             "status": "success", 
-            "message": "Image added to Jenna page",
+            "message": "Image added to Jenna page" if added else "Image is already on the Jenna page",
             "url": f"/uploads/approved/{filename}"
         })
             
@@ -469,42 +2291,63 @@ async def admin_add_jenna(request):
         return web.json_response({"error": str(e)}, status=500)
 
 async def admin_collect_jenna_images(request):
-    """Collect new Jenna images"""
+    """Start collecting new Jenna images; poll /api/admin/jobs/{id} for progress"""
     try:
-        # In a real implementation, you'd fetch new images from the web
-        logger.info("Collecting new Jenna images")
-        
-        # Simulate image collection
-        import time
-        time.sleep(1)  # Simulate processing time
-        
-        return web.json_response({
-            "status": "ok",
-            "message": "Images collected successfully",
-            "count": 5
-        })
-            
-    except Exception as e:
-        logger.error(f"Error collecting images: {e}")
-        return web.json_response({"error": str(e)}, status=500)
+        job = request.app[JOB_QUEUE].submit('collect_jenna_images', collect_jenna_images, request.app)
+    except asyncio.QueueFull:
+        return web.json_response({"error": "Too many jobs queued, try again later"}, status=503)
+    
+    logger.info(f"Collecting new Jenna images (job {job['id']})")
+    return web.json_response({
+        "status": "queued",
+        "job_id": job['id'],
+        "url": f"/api/admin/jobs/{job['id']}"
+    }, status=202)
+
+async def admin_jobs(request):
+    """List recent background jobs"""
+    queue = request.app[JOB_QUEUE]
+    jobs = [job_view(job) for job in reversed(queue.jobs.values())]
+    if queue.state_dir:
+        # Jobs submitted through the other workers
+        shared = await asyncio.get_running_loop().run_in_executor(None, read_job_states, queue.state_dir)
+        jobs += [view for view in shared if view['id'] not in queue.jobs]
+        jobs.sort(key=lambda view: view['created_at'], reverse=True)
+    return web.json_response({'jobs': jobs})
+
+async def admin_job(request):
+    """Get a background job's status and progress"""
+    queue = request.app[JOB_QUEUE]
+    job_id = request.match_info['job_id']
+    job = queue.jobs.get(job_id)
+    if job is not None:
+        return web.json_response(job_view(job))
+    if queue.state_dir and re.fullmatch(r'[0-9a-f]{16}', job_id):
+        shared = await asyncio.get_running_loop().run_in_executor(None, read_job_states, queue.state_dir, job_id)
+        if shared:
+            return web.json_response(shared[0])
+    return web.json_response({"error": "Job not found"}, status=404)
 
 async def admin_channels(request):
     """Manage channels"""
     try:
         data = await request.json()
         action = data.get('action')
+        store = request.app[SITE_STORE]
         
         if action == 'add':
             channel = data.get('channel')
-            if channel:
-                # In a real implementation, you'd add this to your channels database
+            if isinstance(channel, dict) and isinstance(channel.get('name'), str) and channel['name'].strip('# '):
+                channel = store.add_channel(channel)
                 logger.info(f"Adding channel: {channel}")
                 return web.json_response({"status": "success", "message": "Channel added"})
         
         elif action == 'delete':
             name = data.get('name')
-            if name:
-                # In a real implementation, you'd remove this from your channels database
+            if isinstance(name, str) and name:
+                source = cache['channels']['data'] or {}
+                if not store.delete_channel(name, {channel['name'] for channel in source.get('channels', [])}):
+                    return web.json_response({"error": "Channel not found"}, status=404)
                 logger.info(f"Deleting channel: {name}")
                 return web.json_response({"status": "success", "message": "Channel deleted"})
         
@@ -514,43 +2357,794 @@ async def admin_channels(request):
         logger.error(f"Error managing channels: {e}")
         return web.json_response({"error": str(e)}, status=500)
 
+async def admin_ratelimits(request):
+    """Show Discord rate-limit bucket state"""
+    return web.json_response(request.app[DISCORD_CLIENT].bucket_state())
+
+# Upload catalog
+
+class UploadCatalog:
+    """SQLite index of uploads: who uploaded what, when, and its moderation status
+    
+    All queries run on one dedicated thread, so the event loop never waits on
+    disk and the connection is never shared between threads.
+    """
+    
+    STATUSES = ('pending', 'approved')
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='upload-catalog')
+        self.db: Optional[sqlite3.Connection] = None
+    
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+    
+    def open(self):
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS uploads (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                uploader TEXT NOT NULL,
+                uploaded_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                reviewed_at REAL
+            )
+        """)
+        self.db.execute('CREATE INDEX IF NOT EXISTS uploads_by_status ON uploads (status, uploaded_at, id)')
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS jenna (
+                id TEXT PRIMARY KEY,
+                alt TEXT NOT NULL,
+                added_at REAL NOT NULL
+            )
+        """)
+        # Rows arrive in time order, so new entries land at the end of this index
+        self.db.execute('CREATE INDEX IF NOT EXISTS jenna_by_time ON jenna (added_at, id)')
+        self.db.commit()
+    
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+    
+    def sync_with_disk(self) -> Dict[str, int]:
+        """Reconcile the index with uploads/ after files changed while we were down"""
+        on_disk = {}
+        for status in self.STATUSES:
+            with os.scandir(os.path.join(UPLOAD_DIR, status)) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(UPLOAD_EXTENSIONS):
+                        st = entry.stat()
+                        on_disk[entry.name] = (status, st.st_mtime, st.st_size)
+        
+        indexed = {row[0]: row[1] for row in self.db.execute('SELECT id, status FROM uploads')}
+        added = [(name, status, mtime, size) for name, (status, mtime, size) in on_disk.items() if name not in indexed]
+        moved = [(status, name) for name, (status, _, _) in on_disk.items() if name in indexed and indexed[name] != status]
+        removed = [(name,) for name in indexed if name not in on_disk]
+        
+        with self.db:
+            self.db.executemany(
+                "INSERT INTO uploads (id, status, uploader, uploaded_at, size) VALUES (?, ?, 'anonymous', ?, ?)", added
+            )
+            self.db.executemany('UPDATE uploads SET status = ? WHERE id = ?', moved)
+            self.db.executemany('DELETE FROM uploads WHERE id = ?', removed)
+            self.db.execute("DELETE FROM jenna WHERE id NOT IN (SELECT id FROM uploads WHERE status = 'approved')")
+        return {'indexed': len(on_disk), 'added': len(added), 'moved': len(moved), 'removed': len(removed)}
+    
+    def add(self, upload_id: str, uploader: str, size: int, uploaded_at: float):
+        with self.db:
+            self.db.execute(
+                "INSERT OR IGNORE INTO uploads (id, status, uploader, uploaded_at, size) VALUES (?, 'pending', ?, ?, ?)",
+                (upload_id, uploader, uploaded_at, size)
+            )
+    
+    def set_status(self, upload_ids: List[str], status: str):
+        reviewed_at = time.time()
+        with self.db:
+            self.db.executemany(
+                'UPDATE uploads SET status = ?, reviewed_at = ? WHERE id = ?',
+                [(status, reviewed_at, upload_id) for upload_id in upload_ids]
+            )
+    
+    def remove(self, upload_ids: List[str]):
+        rows = [(upload_id,) for upload_id in upload_ids]
+        with self.db:
+            self.db.executemany('DELETE FROM uploads WHERE id = ?', rows)
+            self.db.executemany('DELETE FROM jenna WHERE id = ?', rows)
+    
+    def add_jenna(self, upload_id: str, alt: str) -> Optional[bool]:
+        """Add an approved upload to the Jenna page; False if already there, None if not approved"""
+        with self.db:
+            if self.db.execute("SELECT 1 FROM uploads WHERE id = ? AND status = 'approved'", (upload_id,)).fetchone() is None:
+                return None
+            cursor = self.db.execute(
+                'INSERT OR IGNORE INTO jenna (id, alt, added_at) VALUES (?, ?, ?)', (upload_id, alt, time.time())
+            )
+            return cursor.rowcount == 1
+    
+    def jenna_count(self) -> int:
+        return self.db.execute('SELECT COUNT(*) FROM jenna').fetchone()[0]
+    
+    def jenna_page(self, limit: int, cursor: Optional[str] = None):
+        """One page of the Jenna page's images, newest first, and the cursor for the next"""
+        query = 'SELECT id, alt, added_at FROM jenna'
+        params: list = []
+        if cursor:
+            after_time, after_id = decode_cursor(cursor)
+            query += ' WHERE added_at < ? OR (added_at = ? AND id < ?)'
+            params += [after_time, after_time, after_id]
+        query += ' ORDER BY added_at DESC, id DESC LIMIT ?'
+        rows = self.db.execute(query, params + [limit + 1]).fetchall()
+        
+        next_cursor = encode_cursor(rows[limit - 1][2], rows[limit - 1][0]) if len(rows) > limit else None
+        items = [
+            {'filename': upload_id, 'alt': alt, 'added_at': datetime.fromtimestamp(added_at).isoformat()}
+            for upload_id, alt, added_at in rows[:limit]
+        ]
+        return items, next_cursor
+    
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(self.STATUSES, 0)
+        counts.update(self.db.execute('SELECT status, COUNT(*) FROM uploads GROUP BY status'))
+        return counts
+    
+    def page(self, status: str, limit: int, cursor: Optional[str] = None, newest_first: bool = False):
+        """One page of uploads in (uploaded_at, id) order, and the cursor for the next"""
+        op, order = ('<', 'DESC') if newest_first else ('>', 'ASC')
+        query = 'SELECT id, uploader, uploaded_at, size FROM uploads WHERE status = ?'
+        params: list = [status]
+        if cursor:
+            after_time, after_id = decode_cursor(cursor)
+            query += f' AND (uploaded_at {op} ? OR (uploaded_at = ? AND id {op} ?))'
+            params += [after_time, after_time, after_id]
+        query += f' ORDER BY uploaded_at {order}, id {order} LIMIT ?'
+        rows = self.db.execute(query, params + [limit + 1]).fetchall()
+        
+        next_cursor = encode_cursor(rows[limit - 1][2], rows[limit - 1][0]) if len(rows) > limit else None
+        items = [
+            {
+                'id': upload_id,
+                'filename': upload_id,
+                'uploader': uploader,
+                'uploaded_at': datetime.fromtimestamp(uploaded_at).isoformat(),
+                'size': size
+            }
+            for upload_id, uploader, uploaded_at, size in rows[:limit]
+        ]
+        return items, next_cursor
+
+def encode_cursor(uploaded_at: float, upload_id: str) -> str:
+    return base64.urlsafe_b64encode(f'{uploaded_at!r}:{upload_id}'.encode()).decode()
+
+def decode_cursor(cursor: str):
+    uploaded_at, upload_id = base64.urlsafe_b64decode(cursor.encode()).decode().split(':', 1)
+    return float(uploaded_at), upload_id
+
+UPLOAD_CATALOG_KEY = web.AppKey('upload_catalog', UploadCatalog)
+
+async def open_upload_catalog(app):
+    """Open the upload index and bring it in line with the upload folders"""
+    catalog = UploadCatalog(UPLOAD_CATALOG)
+    await catalog.run(catalog.open)
+    app[UPLOAD_CATALOG_KEY] = catalog
+    if not is_leader():
+        return  # the leader syncs it for every worker
+    started = time.monotonic()
+    changes = await catalog.run(catalog.sync_with_disk)
+    logger.info(f"Upload catalog synced in {time.monotonic() - started:.2f}s: {changes}")
+
+async def close_upload_catalog(app):
+    catalog = app[UPLOAD_CATALOG_KEY]
+    await catalog.run(catalog.close)
+    catalog.executor.shutdown()
+
+# Moderation
+
+MODERATED = {'approve': 'approved', 'reject': 'rejected'}
+
+MODERATION_POOL = web.AppKey('moderation_pool', ThreadPoolExecutor)
+
+def is_upload_name(name) -> bool:
+    """A bare upload filename, safe to join onto an upload folder"""
+    return (
+        isinstance(name, str) and name == os.path.basename(name) and not name.startswith('.')
+        and name.lower().endswith(UPLOAD_EXTENSIONS)
+    )
+
+def move_uploads(action: str, filenames: List[str]) -> Dict[str, str]:
+    """Approve (move to approved/) or reject (delete) pending files; runs on the moderation pool"""
+    results = {}
+    for filename in filenames:
+        pending_file = os.path.join(UPLOAD_DIR, 'pending', filename)
+        try:
+            if action == 'approve':
+                shutil.move(pending_file, os.path.join(UPLOAD_DIR, 'approved', filename))
+            else:
+                os.remove(pending_file)
+            results[filename] = MODERATED[action]
+        except FileNotFoundError:
+            results[filename] = 'not_found'
+        except OSError as e:
+            logger.error(f"Error moderating {filename}: {e}")
+            results[filename] = 'error'
+    return results
+
+async def moderate_uploads(app, action: str, filenames: List[str]) -> Dict[str, str]:
+    """Approve or reject pending uploads; the result for each filename
+    
+    The files are split across the moderation pool's threads, then the
+    catalog is updated for all of them in one transaction.
+    """
+    loop = asyncio.get_running_loop()
+    workers = min(MODERATION_WORKERS, len(filenames))
+    results = {}
+    for part in await asyncio.gather(*(
+        loop.run_in_executor(app[MODERATION_POOL], move_uploads, action, filenames[i::workers]) for i in range(workers)
+    )):
+        results.update(part)
+    
+    done = [filename for filename in filenames if results[filename] == MODERATED[action]]
+    if done:
+        catalog = app[UPLOAD_CATALOG_KEY]
+        if action == 'approve':
+            await catalog.run(catalog.set_status, done, 'approved')
+            refresh_cache(app, 'gallery')
+            for filename in done:
+                queue_derivatives(app, filename)
+        else:
+            await catalog.run(catalog.remove, done)
+    return results
+
+async def start_moderation_pool(app):
+    app[MODERATION_POOL] = ThreadPoolExecutor(max_workers=MODERATION_WORKERS, thread_name_prefix='moderation')
+
+async def stop_moderation_pool(app):
+    await asyncio.get_running_loop().run_in_executor(None, app[MODERATION_POOL].shutdown)
+
 # Upload handling
+
+def find_upload(digest: str) -> Optional[str]:
+    """Stored upload with this content, whatever extension it was uploaded with"""
+    for folder in ('pending', 'approved'):
+        for ext in UPLOAD_EXTENSIONS:
+            if os.path.exists(os.path.join(UPLOAD_DIR, folder, digest + ext)):
+                return digest + ext
+    return None
+
+def commit_upload(temp_path: str, digest: str, ext: str) -> Tuple[str, bool]:
+    """Move a finished upload into pending under its content name
+    
+    Returns the stored filename and whether it is new; content already
+    stored under another extension keeps its existing name.
+    """
+    existing = find_upload(digest)
+    if existing:
+        os.remove(temp_path)
+        return existing, False
+    filename = digest + ext
+    os.replace(temp_path, os.path.join(UPLOAD_DIR, 'pending', filename))
+    return filename, True
+
+def discard_upload(temp_path: str):
+    try:
+        os.remove(temp_path)
+    except FileNotFoundError:
+        pass
+
+class UploadTooLarge(Exception):
+    """An upload crossed UPLOAD_MAX_BYTES while it was streaming"""
+
+async def store_upload(read_chunk: Callable[[], Awaitable[bytes]], ext: str) -> Optional[Dict]:
+    """Stream an image into pending/<sha256><ext>; None if it was empty"""
+    loop = asyncio.get_running_loop()
+    temp_path = os.path.join(UPLOAD_DIR, 'tmp', f'{os.getpid()}-{secrets.token_hex(8)}.part')
+    digest = hashlib.sha256()
+    size = 0
+    
+    # Stream to a temp file, hashing as chunks arrive
+    try:
+        async with aiofiles.open(temp_path, 'wb') as f:
+            while True:
+                chunk = await read_chunk()
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > UPLOAD_MAX_BYTES:
+                    raise UploadTooLarge("File too large")
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        await loop.run_in_executor(None, discard_upload, temp_path)
+        raise
+    
+    if not size:
+        await loop.run_in_executor(None, discard_upload, temp_path)
+        return None
+    
+    filename, created = await loop.run_in_executor(
+        None, commit_upload, temp_path, digest.hexdigest(), CANONICAL_EXTENSIONS.get(ext, ext)
+    )
+    return {'filename': filename, 'duplicate': not created, 'size': size}
+
 async def handle_upload(request):
     """Handle file uploads"""
-    reader = await request.multipart()
+    if request.content_length and request.content_length > UPLOAD_MAX_BYTES + 64 * 1024:
+        return web.json_response({"error": "File too large"}, status=413)
     
-    # Get uploader name
+    reader = await request.multipart()
     uploader = "anonymous"
-    field = await reader.next()
-    if field and field.name == 'uploader':
-        uploader = await field.text()
-    
-    # Get file
-    field = await reader.next()
-    if field and field.name == 'image':
-        filename = field.filename
-        if not filename:
-            return web.json_response({"error": "No file provided"}, status=400)
+    stored = None
+    
+    # Fields may arrive in any order; the image is streamed as it is read
+    while True:
+        field = await reader.next()
+        if field is None:
+            break
         
-        # Save file
-        filepath = os.path.join(UPLOAD_DIR, 'pending', filename)
-        with open(filepath, 'wb') as f:
-            while True:
-                chunk = await field.read_chunk()
-                if not chunk:
-                    break
-                f.write(chunk)
+        if field.name == 'uploader':
+            uploader = (await field.text())[:64] or "anonymous"
         
-        return web.json_response({
-            "status": "success", 
-            "message": "Upload successful",
-            "filename": filename,
-            "uploader": uploader
-        })
+        elif field.name == 'image' and stored is None:
+            ext = os.path.splitext(field.filename or '')[1].lower()
+            if ext not in UPLOAD_EXTENSIONS:
+                return web.json_response({"error": "Unsupported file type"}, status=415)
+            
+            try:
+                stored = await store_upload(lambda: field.read_chunk(UPLOAD_CHUNK_SIZE), ext)
+            except UploadTooLarge as e:
+                return web.json_response({"error": str(e)}, status=413)
+            if stored is None:
+                return web.json_response({"error": "No file provided"}, status=400)
+    
+    if stored is not None and not stored['duplicate']:
+        catalog = request.app[UPLOAD_CATALOG_KEY]
+        await catalog.run(catalog.add, stored['filename'], uploader, stored['size'], time.time())
+    
+    if stored is None:
+        return web.json_response({"error": "Invalid upload"}, status=400)
+    
+    return web.json_response({
+        "status": "success", 
+        "message": "Upload successful" if not stored['duplicate'] else "Already uploaded",
+        "id": stored['filename'],
+        "filename": stored['filename'],
+        "duplicate": stored['duplicate'],
+        "uploader": uploader
+    })
+
+# Background jobs for long admin tasks
+
+class JobQueue:
+    """A few worker tasks running long admin jobs off the request path
+    
+    Handlers submit a coroutine function and answer with the job id at once.
+    Each job runs with a timeout and may report progress on its job dict.
+    With state_dir set, job state is copied there for other worker processes.
+    """
+    
+    def __init__(self, workers: int = JOB_WORKERS, max_queued: int = JOB_MAX_QUEUED, history: int = JOB_HISTORY,
+                 state_dir: Optional[str] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(max_queued)
+        self.jobs: 'OrderedDict[str, Dict]' = OrderedDict()
+        self.history = history
+        self.state_dir = state_dir
+        self.workers = [asyncio.ensure_future(self._work()) for _ in range(workers)]
+        self.sharing = asyncio.ensure_future(self._share()) if state_dir else None
+    
+    def submit(self, kind: str, run: Callable[..., Awaitable], *args, timeout: float = JOB_TIMEOUT) -> Dict:
+        """Queue run(job, *args); raises asyncio.QueueFull when the queue is full"""
+        job = {
+            'id': secrets.token_hex(8),
+            'kind': kind,
+            'status': 'queued',
+            'progress': None,
+            'message': '',
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None
+        }
+        self.queue.put_nowait((job, run, args, timeout))
+        self.jobs[job['id']] = job
+        
+        # Forget the oldest finished jobs past the history limit
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.history:
+                break
+            if self.jobs[job_id]['finished_at']:
+                del self.jobs[job_id]
+        return job
+    
+    async def _work(self):
+        while True:
+            job, run, args, timeout = await self.queue.get()
+            job['status'] = 'running'
+            job['started_at'] = time.time()
+            try:
+                job['result'] = await asyncio.wait_for(run(job, *args), timeout)
+                job['status'] = 'done'
+            except asyncio.TimeoutError:
+                job['status'] = 'timeout'
+                job['error'] = f"Timed out after {timeout:g}s"
+            except asyncio.CancelledError:
+                job['status'] = 'cancelled'
+                raise
+            except Exception as e:
+                logger.error(f"Job {job['id']} ({job['kind']}) failed: {e}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                job['finished_at'] = time.time()
+    
+    async def _share(self):
+        """Write the jobs that changed since the last pass to state_dir"""
+        written: Dict[str, Dict] = {}
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(JOB_SHARE_INTERVAL)
+            changed = {}
+            for job_id, job in self.jobs.items():
+                view = job_view(job)
+                if written.get(job_id) != view:
+                    changed[job_id] = view
+            removed = [job_id for job_id in written if job_id not in self.jobs]
+            if not changed and not removed:
+                continue
+            try:
+                await loop.run_in_executor(None, write_job_states, self.state_dir, changed, removed)
+            except OSError as e:
+                logger.error(f"Error sharing job state: {e}")
+                continue
+            written.update(changed)
+            for job_id in removed:
+                del written[job_id]
+    
+    async def close(self):
+        tasks = self.workers + ([self.sharing] if self.sharing else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job in self.jobs.values():
+            if job['finished_at'] is None:
+                job['status'] = 'cancelled'
+                job['finished_at'] = time.time()
+        if self.state_dir:
+            write_job_states(self.state_dir, {job_id: job_view(job) for job_id, job in self.jobs.items()}, [])
+
+def job_view(job: Dict) -> Dict:
+    """A job as JSON, with ISO timestamps"""
+    view = dict(job)
+    for field in ('created_at', 'started_at', 'finished_at'):
+        if view[field] is not None:
+            view[field] = datetime.fromtimestamp(view[field]).isoformat()
+    return view
+
+def write_job_states(state_dir: str, views: Dict[str, Dict], removed: List[str]):
+    for job_id, view in views.items():
+        path = os.path.join(state_dir, f'{job_id}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(view, f)
+        os.replace(f'{path}.tmp', path)
+    for job_id in removed:
+        try:
+            os.remove(os.path.join(state_dir, f'{job_id}.json'))
+        except FileNotFoundError:
+            pass
+
+def read_job_states(state_dir: str, job_id: Optional[str] = None) -> List[Dict]:
+    """Jobs shared by every worker, or just job_id"""
+    if job_id is not None:
+        names = [f'{job_id}.json']
+    else:
+        names = [name for name in os.listdir(state_dir) if name.endswith('.json')]
+    views = []
+    for name in names:
+        try:
+            with open(os.path.join(state_dir, name)) as f:
+                views.append(json.load(f))
+        except (OSError, ValueError):
+            continue  # not shared yet, or evicted meanwhile
+    return views
+
+JOB_QUEUE = web.AppKey('job_queue', JobQueue)
+
+async def start_job_queue(app):
+    app[JOB_QUEUE] = JobQueue(state_dir=job_state_dir)
+
+async def stop_job_queue(app):
+    await app[JOB_QUEUE].close()
+
+def source_extension(url: str, content_type: str) -> Optional[str]:
+    """Upload extension for a downloaded image, from its Content-Type or URL"""
+    if content_type in UPLOAD_CONTENT_TYPES:
+        return UPLOAD_CONTENT_TYPES[content_type]
+    ext = os.path.splitext(url.split('?', 1)[0])[1].lower()
+    return ext if ext in UPLOAD_EXTENSIONS else None
+
+async def collect_jenna_images(job: Dict, app) -> Dict:
+    """Download JENNA_SOURCES concurrently into the moderation queue"""
+    results = {'count': 0, 'duplicates': 0, 'failed': 0}
+    job['progress'] = {'done': 0, 'total': len(JENNA_SOURCES)}
+    catalog = app[UPLOAD_CATALOG_KEY]
+    semaphore = asyncio.Semaphore(COLLECT_CONCURRENCY)
+    
+    async def collect(session: ClientSession, url: str):
+        async with semaphore:
+            try:
+                async with session.get(url) as resp:
+                    resp.raise_for_status()
+                    ext = source_extension(url, resp.content_type)
+                    if ext is None:
+                        raise ValueError(f"not an image ({resp.content_type})")
+                    stored = await store_upload(lambda: resp.content.read(UPLOAD_CHUNK_SIZE), ext)
+                if stored is None:
+                    raise ValueError("empty response")
+                if stored['duplicate']:
+                    results['duplicates'] += 1
+                else:
+                    await catalog.run(catalog.add, stored['filename'], 'collector', stored['size'], time.time())
+                    results['count'] += 1
+            except (aiohttp.ClientError, asyncio.TimeoutError, UploadTooLarge, ValueError) as e:
+                logger.warning(f"Could not collect {url}: {e}")
+                results['failed'] += 1
+            job['progress']['done'] += 1
+    
+    timeout = aiohttp.ClientTimeout(total=120, sock_connect=DISCORD_CONNECT_TIMEOUT)
+    async with ClientSession(timeout=timeout) as session:
+        await asyncio.gather(*(collect(session, url) for url in JENNA_SOURCES))
+    
+    job['message'] = f"Collected {results['count']} new images for review"
+    return results
+
+# Image derivatives
+IMAGE_POOL = web.AppKey('image_pool', ProcessPoolExecutor)
+
+def list_approved() -> List:
+    """Approved images as (filename, mtime), newest first"""
+    entries = []
+    with os.scandir(os.path.join(UPLOAD_DIR, 'approved')) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(UPLOAD_EXTENSIONS):
+                entries.append((entry.name, entry.stat().st_mtime))
+    entries.sort(key=lambda e: e[1], reverse=True)
+    return entries
+
+def file_digest(path: str) -> str:
+    """Content hash of an image; uploads are already named by it"""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    if re.fullmatch(r'[0-9a-f]{64}', stem):
+        return stem
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(UPLOAD_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def make_derivatives(source: str) -> Dict:
+    """Resize an image to IMAGE_WIDTHS in each of IMAGE_FORMATS; runs in the image pool"""
+    digest = file_digest(source)
+    manifest_path = os.path.join(DERIVED_DIR, f'{digest}.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            return json.load(f)
+    
+    with Image.open(source) as original:
+        img = ImageOps.exif_transpose(original)
+        width, height = img.size
+        has_alpha = img.mode in ('RGBA', 'LA') or 'transparency' in img.info
+        img = img.convert('RGBA' if has_alpha else 'RGB')
+        
+        sizes = []
+        for target in sorted({min(w, width) for w in IMAGE_WIDTHS}):
+            target_height = max(1, round(height * target / width))
+            resized = img if target == width else img.resize((target, target_height), Image.LANCZOS)
+            size = {'width': target, 'height': target_height}
+            for ext, image_format in IMAGE_FORMATS.items():
+                name = f'{digest}-{target}.{ext}'
+                temp_path = os.path.join(DERIVED_DIR, f'.{name}.{os.getpid()}')
+                out = resized.convert('RGB') if image_format == 'JPEG' else resized
+                out.save(temp_path, image_format, quality=IMAGE_QUALITY)
+                os.replace(temp_path, os.path.join(DERIVED_DIR, name))
+                size[ext] = f'/{UPLOAD_DIR}/derived/{name}'
+            sizes.append(size)
+    
+    # The manifest goes last, so its presence means every size is on disk
+    manifest = {'hash': digest, 'width': width, 'height': height, 'sizes': sizes}
+    temp_path = f'{manifest_path}.{os.getpid()}'
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, manifest_path)
+    return manifest
+
+def read_manifests(filenames: List[str]) -> Dict[str, Dict]:
+    """Derivative manifests already on disk for approved filenames"""
+    manifests = {}
+    for filename in filenames:
+        try:
+            digest = file_digest(os.path.join(UPLOAD_DIR, 'approved', filename))
+            with open(os.path.join(DERIVED_DIR, f'{digest}.json')) as f:
+                manifests[filename] = json.load(f)
+        except (OSError, ValueError):
+            continue  # not made yet
+    return manifests
+
+async def load_derivatives(filenames: List[str]):
+    """Pick up manifests made by another worker, or before a restart"""
+    missing = [filename for filename in filenames if filename not in derivatives]
+    if missing:
+        derivatives.update(await asyncio.get_running_loop().run_in_executor(None, read_manifests, missing))
+
+def with_derivatives(image: Dict) -> Dict:
+    """Add thumbnail and srcset fields to an image whose derivatives are ready"""
+    prefix = f'/{UPLOAD_DIR}/approved/'
+    manifest = image['url'].startswith(prefix) and derivatives.get(image['url'][len(prefix):])
+    if not manifest:
+        return image
+    sizes = manifest['sizes']
+    return {
+        **image,
+        'width': manifest['width'],
+        'height': manifest['height'],
+        'thumbnail': sizes[0]['webp'],
+        'srcset': ', '.join(f"{s['webp']} {s['width']}w" for s in sizes),
+        'srcset_jpeg': ', '.join(f"{s['jpg']} {s['width']}w" for s in sizes)
+    }
+
+def queue_derivatives(app, filename: str):
+    """Make derivatives for an approved image in the background"""
+    if IMAGE_POOL not in app or filename in derivative_jobs:
+        return
+    task = asyncio.ensure_future(_run_derivatives(app, filename))
+    derivative_jobs[filename] = task
+    task.add_done_callback(lambda t: _finish_derivatives(app, filename, t))
+
+async def _run_derivatives(app, filename: str):
+    loop = asyncio.get_running_loop()
+    source = os.path.join(UPLOAD_DIR, 'approved', filename)
+    derivatives[filename] = await loop.run_in_executor(app[IMAGE_POOL], make_derivatives, source)
+
+def _finish_derivatives(app, filename: str, task: asyncio.Task):
+    derivative_jobs.pop(filename, None)
+    if task.cancelled():
+        return
+    if task.exception():
+        logger.error(f"Error making derivatives for {filename}: {task.exception()}")
+    # Rebuild the image feeds once the current batch is done
+    if not derivative_jobs:
+        refresh_cache(app, 'gallery')
+        refresh_cache(app, 'jenna')
+
+async def start_image_pool(app):
+    if Image is None:
+        logger.warning("Pillow is not installed; approved images will be served without thumbnails")
+        return
+    app[IMAGE_POOL] = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    if not is_leader():
+        return
     
-    return web.json_response({"error": "Invalid upload"}, status=400)
+    # Pick up manifests made before a restart and fill in any that are missing
+    loop = asyncio.get_running_loop()
+    for filename, _ in await loop.run_in_executor(None, list_approved):
+        queue_derivatives(app, filename)
+
+async def stop_image_pool(app):
+    for task in list(derivative_jobs.values()):
+        task.cancel()
+    if IMAGE_POOL in app:
+        await asyncio.get_running_loop().run_in_executor(None, app[IMAGE_POOL].shutdown)
 
 # Static file serving
+
+def guess_content_type(path: str) -> str:
+    """Content type for a static file, with charset for text"""
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type == 'application/javascript':
+        content_type += '; charset=utf-8'
+    return content_type
+
+async def load_static(filepath: str, st: os.stat_result) -> Dict:
+    """Small file from the LRU, re-read whenever its mtime or size changes"""
+    entry = static_cache.get(filepath)
+    if entry and entry['mtime_ns'] == st.st_mtime_ns and entry['size'] == st.st_size:
+        static_cache.move_to_end(filepath)
+        return entry
+    
+    async with aiofiles.open(filepath, 'rb') as f:
+        body = await f.read()
+    
+    entry = {
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'body': body,
+        # Same ETag format as aiohttp's FileResponse, so both paths agree
+        'etag': f'"{st.st_mtime_ns:x}-{st.st_size:x}"',
+        'last_modified': datetime.fromtimestamp(int(st.st_mtime), timezone.utc).strftime('%a, %d %b %Y %H:%M:%S GMT')
+    }
+    static_cache[filepath] = entry
+    static_cache.move_to_end(filepath)
+    
+    total = sum(cached['size'] for cached in static_cache.values())
+    while total > STATIC_CACHE_MAX_BYTES and len(static_cache) > 1:
+        _, evicted = static_cache.popitem(last=False)
+        total -= evicted['size']
+    return entry
+
+def not_modified(request, etag: str, mtime: float) -> bool:
+    """Conditional GET check; If-None-Match wins over If-Modified-Since"""
+    if request.headers.get('If-None-Match'):
+        return etag_matches(request, {etag})
+    since = request.if_modified_since
+    return since is not None and int(mtime) <= since.timestamp()
+
+def is_private(filepath: str) -> bool:
+    real = os.path.realpath(filepath)
+    return any(real == private or real.startswith(private + '-') for private in PRIVATE_FILES)
+
+BUILD_SUFFIXES = {'br': '.br', 'gzip': '.gz', 'identity': ''}
+
+def read_static_build(build_dir: str) -> Optional[Dict]:
+    path = os.path.join(build_dir, 'manifest.json')
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"No usable static build in {build_dir} ({e}); serving the source files")
+        return None
+    manifest['hashed'] = set(manifest['assets'].values())
+    manifest['mtime_ns'] = mtime
+    return manifest
+
+async def load_static_build(app):
+    global static_build
+    static_build = await asyncio.get_running_loop().run_in_executor(None, read_static_build, STATIC_BUILD_DIR)
+    if static_build is not None:
+        logger.info(f"Serving {len(static_build['files'])} built files from {STATIC_BUILD_DIR}")
+
+async def reload_static_build(app):
+    """Job: switch to a rebuilt STATIC_BUILD_DIR, whose hashed names have changed"""
+    mtime = file_mtime(os.path.join(STATIC_BUILD_DIR, 'manifest.json'))
+    if mtime != (static_build and static_build['mtime_ns']):
+        await load_static_build(app)
+
+async def serve_built(request, path: str) -> Optional[web.Response]:
+    """A file from the static build, precompressed for the client; None if it is not in the build
+    
+    Hashed files never change under their name, so they are cached for a
+    year; the HTML pointing at them is revalidated on every use.
+    """
+    encodings = static_build['files'].get(path)
+    if encodings is None:
+        return None
+    encoding = pick_encoding(request.headers.get('Accept-Encoding', ''), dict.fromkeys(encodings))
+    filepath = os.path.join(STATIC_BUILD_DIR, path + BUILD_SUFFIXES[encoding])
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None  # rebuilt underneath us; the sources still answer
+    
+    entry = await load_static(filepath, st)
+    headers = {
+        'ETag': entry['etag'],
+        'Last-Modified': entry['last_modified'],
+        'Cache-Control': (
+            f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable' if path in static_build['hashed'] else 'no-cache'
+        ),
+        'Vary': 'Accept-Encoding'
+    }
+    if not_modified(request, entry['etag'], st.st_mtime):
+        return web.Response(status=304, headers=headers)
+    
+    headers['Content-Type'] = guess_content_type(path)
+    if encoding != 'identity':
+        headers['Content-Encoding'] = encoding
+    return web.Response(body=entry['body'], headers=headers)
+
 async def serve_static(request):
     """Serve static files"""
     path = request.match_info['path']
@@ -559,46 +3153,166 @@ async def serve_static(request):
     if '..' in path:
         return web.Response(status=404)
     
+    # Dotfiles (.env, .git) and server state are never served
+    if any(part.startswith('.') for part in path.split('/')) or is_private(os.path.join(DATA_DIR, path)):
+        return web.Response(status=404)
+    
+    if static_build is not None:
+        response = await serve_built(request, path)
+        if response is not None:
+            return response
+    
     filepath = os.path.join(DATA_DIR, path)
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return web.Response(status=404)
+    if not stat.S_ISREG(st.st_mode):
+        return web.Response(status=404)
     
-    if os.path.isfile(filepath):
-        content_type = 'application/octet-stream'
-        if path.endswith('.css'):
-            content_type = 'text/css'
-        elif path.endswith('.js'):
-            content_type = 'application/javascript'
-        elif path.endswith('.html'):
-            content_type = 'text/html'
-        elif path.endswith(('.jpg', '.jpeg', '.png', '.gif', '.webp')):
-            content_type = 'image/*'
-        
-        async with aiofiles.open(filepath, 'rb') as f:
-            content = await f.read()
-        
-        return web.Response(body=content, content_type=content_type)
+    content_type = guess_content_type(path)
+    
+    # Large files and ranges: sendfile, with aiohttp handling Range and conditionals
+    if st.st_size > STATIC_CACHE_MAX_FILE or 'Range' in request.headers:
+        return web.FileResponse(filepath, headers={'Content-Type': content_type})
     
-    return web.Response(status=404)
+    entry = await load_static(filepath, st)
+    headers = {'ETag': entry['etag'], 'Last-Modified': entry['last_modified']}
+    if not_modified(request, entry['etag'], st.st_mtime):
+        return web.Response(status=304, headers=headers)
+    
+    headers['Content-Type'] = content_type
+    return web.Response(body=entry['body'], headers=headers)
+
+# Request metrics and event loop lag
+
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Count and time every request by its route pattern"""
+    started = time.perf_counter()
+    status = '500'
+    try:
+        response = await handler(request)
+        status = str(response.status)
+        return response
+    except web.HTTPException as e:
+        status = str(e.status)
+        raise
+    except asyncio.CancelledError:
+        status = '499'  # client went away
+        raise
+    finally:
+        resource = request.match_info.route.resource
+        route = resource.canonical if resource is not None else 'unmatched'
+        http_requests.inc((request.method, route, status))
+        http_latency.observe((request.method, route), time.perf_counter() - started)
+
+async def metrics(request):
+    """Prometheus metrics"""
+    return web.Response(
+        body=render_metrics().encode(),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    )
+
+LOOP_MONITOR = web.AppKey('loop_monitor', asyncio.Task)
+
+async def monitor_loop_lag():
+    """Sample how late timers fire; anything blocking the loop shows up here"""
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        await asyncio.sleep(LOOP_LAG_INTERVAL)
+        lag = max(0.0, loop.time() - started - LOOP_LAG_INTERVAL)
+        loop_lag.observe((), lag)
+        if lag > loop_lag_max.values.get((), 0):
+            loop_lag_max.set((), lag)
+        if lag > LOOP_LAG_WARN:
+            logger.warning(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+async def start_loop_monitor(app):
+    app[LOOP_MONITOR] = asyncio.ensure_future(monitor_loop_lag())
+
+async def stop_loop_monitor(app):
+    app[LOOP_MONITOR].cancel()
+    await asyncio.gather(app[LOOP_MONITOR], return_exceptions=True)
 
 # Main application setup
 async def init_app():
-    app = web.Application()
+    leader = is_leader()
+    app = web.Application(middlewares=[metrics_middleware])
+    app[SCHEDULED_JOBS] = []
+    app.on_startup.append(start_discord_client)
+    app.on_startup.append(open_upload_catalog)
+    app.on_startup.append(start_join_recorder)
+    app.on_startup.append(start_site_store)
+    if STATIC_BUILD_DIR:
+        app.on_startup.append(load_static_build)
+    app.on_startup.append(start_scheduler)
+    app.on_startup.append(start_image_pool)
+    app.on_startup.append(start_moderation_pool)
+    app.on_startup.append(start_job_queue)
+    app.on_startup.append(start_loop_monitor)
+    app.on_shutdown.append(stop_scheduler)
+    if leader:
+        app.on_shutdown.append(save_cache_snapshot)
+    app.on_shutdown.append(stop_join_recorder)
+    app.on_shutdown.append(stop_site_store)
+    app.on_shutdown.append(close_streams)
+    app.on_shutdown.append(stop_job_queue)
+    app.on_shutdown.append(stop_loop_monitor)
+    if DISCORD_GATEWAY_ENABLED and leader:
+        app[DISCORD_GATEWAY] = GatewayClient(app)
+        app.on_startup.append(start_gateway)
+        app.on_shutdown.append(stop_gateway)
+    app.on_cleanup.append(close_discord_client)
+    app.on_cleanup.append(stop_image_pool)
+    app.on_cleanup.append(stop_moderation_pool)
+    app.on_cleanup.append(close_upload_catalog)
+    
+    # Serve the last known data right away, then keep it fresh
+    if leader:
+        # A restarted leader takes over the followers' copy; it is newer than the disk
+        if shared_cache is None or not shared_cache.pull():
+            await load_cache_snapshot()
+        schedule_cache_refreshes(app)
+        schedule_job(app, 'snapshot:cache', CACHE_SNAPSHOT_INTERVAL, save_cache_snapshot)
+        if shared_cache is not None:
+            schedule_job(app, 'shared:requests', SHARED_CACHE_POLL, serve_refresh_requests)
+    else:
+        schedule_job(app, 'shared:pull', SHARED_CACHE_POLL, pull_shared_cache)
+    if shared_cache is not None:
+        schedule_job(app, 'reload:site', SITE_RELOAD_INTERVAL, reload_site_store)
+    schedule_job(app, 'flush:joins', JOIN_FLUSH_INTERVAL, flush_joins)
+    if STATIC_BUILD_DIR:
+        schedule_job(app, 'reload:static', STATIC_BUILD_POLL, reload_static_build)
     
     # API routes
     app.router.add_get('/api/invite', api_invite)
+    app.router.add_get('/api/stream', api_stream)
     app.router.add_get('/api/channels', api_channels)
+    app.router.add_get('/api/site', api_site)
     app.router.add_get('/api/moderators', api_moderators)
     app.router.add_get('/api/gallery', api_gallery)
     app.router.add_get('/api/jenna', api_jenna)
     app.router.add_post('/api/join', api_join)
+    app.router.add_get('/api/join/stats', api_join_stats)
     
     # Admin routes
     app.router.add_get('/api/admin/uploads', admin_uploads)
     app.router.add_post('/api/admin/approve', admin_approve)
     app.router.add_post('/api/admin/reject', admin_reject)
+    app.router.add_post('/api/admin/approve_batch', admin_approve_batch)
+    app.router.add_post('/api/admin/reject_batch', admin_reject_batch)
     app.router.add_post('/api/admin/set_asset', admin_set_asset)
     app.router.add_post('/api/admin/add_jenna', admin_add_jenna)
     app.router.add_post('/api/admin/collect_jenna_images', admin_collect_jenna_images)
+    app.router.add_get('/api/admin/jobs', admin_jobs)
+    app.router.add_get('/api/admin/jobs/{job_id}', admin_job)
     app.router.add_post('/api/admin/channels', admin_channels)
+    app.router.add_get('/api/admin/ratelimits', admin_ratelimits)
+    
+    # Monitoring
+    app.router.add_get('/metrics', metrics)
     
     # Upload route
     app.router.add_post('/api/upload', handle_upload)
@@ -608,11 +3322,86 @@ async def init_app():
     
     return app
 
+# Pre-fork workers: WORKERS processes accept on one port through SO_REUSEPORT.
+# Worker 0 leads: it alone calls Discord, runs the scheduled refreshes and
+# publishes the cache. The followers serve from the shared copy.
+
+def run_worker(index: int, workdir: str, host: str, port: int):
+    global shared_cache, job_state_dir
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    random.seed()  # forked workers would otherwise share the scheduler jitter
+    shared_cache = SharedCache(os.path.join(workdir, 'cache'), leader=index == 0)
+    job_state_dir = os.path.join(workdir, 'jobs')
+    logger.info(f"Worker {index} (pid {os.getpid()}) started as {'leader' if index == 0 else 'follower'}")
+    web.run_app(init_app(), host=host, port=port, reuse_port=True, print=print if index == 0 else None)
+
+def run_workers(count: int, host: str, port: int):
+    """Fork count workers and restart any that exit, until SIGTERM or SIGINT"""
+    shm = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    workdir = tempfile.mkdtemp(prefix='jenna-workers-', dir=shm)
+    with open(os.path.join(workdir, 'cache'), 'wb') as f:
+        f.truncate(SHARED_CACHE_SIZE)
+    os.mkdir(os.path.join(workdir, 'jobs'))
+    
+    children: Dict[int, int] = {}
+    stopping = False
+    
+    def spawn(index: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(index, workdir, host, port)
+            except (web.GracefulExit, KeyboardInterrupt, SystemExit):
+                pass  # a signal arriving during shutdown interrupts cleanup; still a clean stop
+            except BaseException:
+                logger.exception(f"Worker {index} crashed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = index
+    
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        # Workers are already shutting down; a repeated signal would cut their cleanup (and ours) short
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+    
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    try:
+        for index in range(count):
+            spawn(index)
+        while children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = children.pop(pid, None)
+            if index is not None and not stopping:
+                logger.warning(f"Worker {index} (pid {pid}) exited with status {status}; restarting it")
+                time.sleep(1)
+                spawn(index)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
 if __name__ == '__main__':
     # Check for environment variables
     if DISCORD_BOT_TOKEN == 'YOUR_BOT_TOKEN_HERE' or GUILD_ID == 'YOUR_GUILD_ID_HERE':
         logger.warning("Please set DISCORD_BOT_TOKEN and GUILD_ID environment variables for real Discord integration")
         logger.warning("Current stats will use demo data")
     
-    app = init_app()
-    web.run_app(app, host='0.0.0.0', port=8000)
\ No newline at end of file
+    if WORKERS > 1 and hasattr(os, 'fork') and hasattr(socket, 'SO_REUSEPORT'):
+        run_workers(WORKERS, host='0.0.0.0', port=8000)
+    else:
+        if WORKERS > 1:
+            logger.warning("WORKERS needs fork and SO_REUSEPORT; running a single process")
+        app = init_app()
+        web.run_app(app, host='0.0.0.0', port=8000)
\ No newline at end of file
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Mock Discord API
+Local stand-in for the Discord REST endpoints and Gateway dev.py uses, for offline testing
+
+    python mock_discord.py --port 8081 --members 5000 --rate-limit 5
+    DISCORD_API=http://localhost:8081/api/v10 GUILD_ID=1 python dev.py
+
+    # with the Gateway; push events with POST /_mock/dispatch {"t": ..., "d": ...}
+    DISCORD_GATEWAY=1 DISCORD_GATEWAY_URL=ws://localhost:8081/gateway ... python dev.py
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List
+from aiohttp import web
+
+MOCK_GUILD_ID = '1'
+STAFF_ROLES = ['Owner', 'Admin', 'Moderator', 'Staff']
+
+def make_roles() -> List[Dict]:
+    """Roles: @everyone, the staff roles, then plain member roles"""
+    names = ['@everyone'] + STAFF_ROLES + ['Member', 'Booster', 'Artist']
+    return [{'id': str(100 + i), 'name': name, 'position': len(names) - i} for i, name in enumerate(names)]
+
+def make_members(count: int, roles: List[Dict]) -> List[Dict]:
+    """Members sorted by user id, as Discord returns them; the first few are staff"""
+    staff_ids = [role['id'] for role in roles if role['name'] in STAFF_ROLES]
+    other_ids = [role['id'] for role in roles if role['name'] not in STAFF_ROLES and role['name'] != '@everyone']
+    rng = random.Random(count)
+    members = []
+    for i in range(count):
+        member_roles = [staff_ids[i]] if i < len(staff_ids) else rng.sample(other_ids, rng.randint(0, 2))
+        members.append({
+            'user': {'id': str(10 ** 17 + i), 'username': f'user{i}', 'avatar': None, 'bot': i % 97 == 96},
+            'roles': member_roles,
+            'joined_at': f'2023-{i % 12 + 1:02d}-{i % 28 + 1:02d}T00:00:00.000000+00:00'
+        })
+    return members
+
+def make_channels(count: int = 20) -> List[Dict]:
+    names = ['chat', 'media', 'jenna-ortega', 'fun-facts', 'qotd', 'events', 'contests', 'spam', 'selfie', 'starboard']
+    return [
+        {'id': str(500 + i), 'type': 0 if i % 5 else 5, 'name': names[i % len(names)] + ('' if i < len(names) else f'-{i}'), 'topic': None}
+        for i in range(count)
+    ]
+
+class RateLimiter:
+    """Fixed-window per-route buckets shaped like Discord's"""
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.windows: Dict[str, Dict] = {}
+
+    def hit(self, route: str) -> Dict:
+        now = time.monotonic()
+        state = self.windows.get(route)
+        if state is None or state['reset_at'] <= now:
+            state = self.windows[route] = {'used': 0, 'reset_at': now + self.window}
+        state['used'] += 1
+        return {
+            'limited': state['used'] > self.limit,
+            'remaining': max(0, self.limit - state['used']),
+            'reset_after': state['reset_at'] - now
+        }
+
+def apply_event(data: Dict, event: str, payload: Dict):
+    """Mirror a dispatched Gateway event into the REST data"""
+    def upsert(items: List[Dict], item: Dict, key):
+        for i, existing in enumerate(items):
+            if key(existing) == key(item):
+                items[i] = item
+                return
+        items.append(item)
+        items.sort(key=lambda existing: int(key(existing)))
+
+    if event in ('CHANNEL_CREATE', 'CHANNEL_UPDATE'):
+        upsert(data['channels'], payload, lambda c: c['id'])
+    elif event == 'CHANNEL_DELETE':
+        data['channels'] = [c for c in data['channels'] if c['id'] != payload['id']]
+    elif event in ('GUILD_ROLE_CREATE', 'GUILD_ROLE_UPDATE'):
+        upsert(data['roles'], payload['role'], lambda r: r['id'])
+    elif event == 'GUILD_ROLE_DELETE':
+        data['roles'] = [r for r in data['roles'] if r['id'] != payload['role_id']]
+    elif event in ('GUILD_MEMBER_ADD', 'GUILD_MEMBER_UPDATE'):
+        member = {k: v for k, v in payload.items() if k != 'guild_id'}
+        upsert(data['members'], member, lambda m: m['user']['id'])
+    elif event == 'GUILD_MEMBER_REMOVE':
+        data['members'] = [m for m in data['members'] if m['user']['id'] != payload['user']['id']]
+
+def create_app(members: int = 2500, latency: float = 0.0, rate_limit: int = 0,
+               window: float = 1.0, global_429_rate: float = 0.0,
+               heartbeat_interval: int = 41250) -> web.Application:
+    """Build the mock app; rate_limit=0 disables bucket limits"""
+    app = web.Application()
+    roles = make_roles()
+    data = {
+        'guild': {'id': MOCK_GUILD_ID, 'name': 'Mock Jenna Ortega Fan Server', 'icon': None},
+        'roles': roles,
+        'members': make_members(members, roles),
+        'channels': make_channels()
+    }
+    limiter = RateLimiter(rate_limit, window) if rate_limit else None
+    counters = {'requests': 0, 'rate_limited': 0}
+    sockets: Dict[web.WebSocketResponse, Dict] = {}  # identified gateway sockets -> seq state
+
+    @web.middleware
+    async def discord_behaviour(request, handler):
+        if not request.path.startswith('/api/'):
+            return await handler(request)  # gateway and mock controls are exempt
+        counters['requests'] += 1
+        if latency:
+            await asyncio.sleep(latency)
+        if global_429_rate and random.random() < global_429_rate:
+            counters['rate_limited'] += 1
+            return web.json_response(
+                {'message': 'You are being rate limited.', 'retry_after': 0.2, 'global': True},
+                status=429, headers={'X-RateLimit-Global': 'true', 'Retry-After': '1'}
+            )
+        if limiter is None:
+            return await handler(request)
+
+        route = request.match_info.route.resource.canonical
+        state = limiter.hit(route)
+        headers = {
+            'X-RateLimit-Limit': str(rate_limit),
+            'X-RateLimit-Remaining': str(state['remaining']),
+            'X-RateLimit-Reset-After': f"{state['reset_after']:.3f}",
+            'X-RateLimit-Bucket': f'bucket-{abs(hash(route)) % 10000}'
+        }
+        if state['limited']:
+            counters['rate_limited'] += 1
+            return web.json_response(
+                {'message': 'You are being rate limited.', 'retry_after': round(state['reset_after'], 3), 'global': False},
+                status=429, headers=headers
+            )
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def guild(request):
+        counts = {}
+        if request.query.get('with_counts') == 'true':
+            counts = {'approximate_member_count': len(data['members']),
+                      'approximate_presence_count': len(data['members']) // 5}
+        return web.json_response({**data['guild'], **counts})
+
+    async def channels(request):
+        return web.json_response(data['channels'])
+
+    async def roles_handler(request):
+        return web.json_response(data['roles'])
+
+    async def members_handler(request):
+        limit = min(int(request.query.get('limit', 1)), 1000)
+        after = int(request.query.get('after', 0))
+        page = [m for m in data['members'] if int(m['user']['id']) > after][:limit]
+        return web.json_response(page)
+
+    async def stats(request):
+        return web.json_response(counters)
+
+    async def send_dispatch(ws: web.WebSocketResponse, state: Dict, event: str, payload: Dict):
+        state['seq'] += 1
+        await ws.send_json({'op': 0, 's': state['seq'], 't': event, 'd': payload})
+
+    async def gateway(request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        state = {'seq': 0}
+        await ws.send_json({'op': 10, 's': None, 't': None, 'd': {'heartbeat_interval': heartbeat_interval}})
+        async for msg in ws:
+            payload = msg.json()
+            if payload['op'] == 1:
+                await ws.send_json({'op': 11, 's': None, 't': None, 'd': None})
+            elif payload['op'] == 2:
+                resume_url = f'ws://{request.host}/gateway'
+                await send_dispatch(ws, state, 'READY', {'v': 10, 'session_id': f'mock-{id(ws)}', 'resume_gateway_url': resume_url})
+                await send_dispatch(ws, state, 'GUILD_CREATE', {
+                    **data['guild'],
+                    'member_count': len(data['members']),
+                    'channels': data['channels'],
+                    'roles': data['roles']
+                })
+                sockets[ws] = state
+            elif payload['op'] == 6:
+                state['seq'] = payload['d'].get('seq') or 0
+                await send_dispatch(ws, state, 'RESUMED', {})
+                sockets[ws] = state
+        sockets.pop(ws, None)
+        return ws
+
+    async def dispatch(request):
+        body = await request.json()
+        payload = {**body['d'], 'guild_id': MOCK_GUILD_ID}
+        apply_event(data, body['t'], payload)
+        for ws, state in list(sockets.items()):
+            await send_dispatch(ws, state, body['t'], payload)
+        return web.json_response({'delivered': len(sockets)})
+
+    app.middlewares.append(discord_behaviour)
+    app.router.add_get('/api/v10/guilds/{guild_id}', guild)
+    app.router.add_get('/api/v10/guilds/{guild_id}/channels', channels)
+    app.router.add_get('/api/v10/guilds/{guild_id}/roles', roles_handler)
+    app.router.add_get('/api/v10/guilds/{guild_id}/members', members_handler)
+    app.router.add_get('/gateway', gateway)
+    app.router.add_get('/_mock/stats', stats)
+    app.router.add_post('/_mock/dispatch', dispatch)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local mock Discord API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8081)
+    parser.add_argument('--members', type=int, default=2500, help='guild member count')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--rate-limit', type=int, default=0, help='requests per route per window (0 = unlimited)')
+    parser.add_argument('--window', type=float, default=1.0, help='rate-limit window in seconds')
+    parser.add_argument('--global-429-rate', type=float, default=0.0, help='fraction of requests answered with a global 429')
+    args = parser.parse_args()
+
+    app = create_app(args.members, args.latency, args.rate_limit, args.window, args.global_429_rate)
+    web.run_app(app, host=args.host, port=args.port)
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,23 @@ const INVITE = 'https://discord.gg/XbR2fgFv';
 // Enhanced gallery stats and filtering
 let galleryData = [];
 let jennaData = [];
+let galleryTotal = null;
+let jennaTotal = null;
+
+// Grid image: thumbnail + srcset when the server has derivatives, original kept for the lightbox
+function gridImage(img, alt) {
+  const el = document.createElement('img');
+  el.src = img.thumbnail || img.url;
+  if (img.srcset) {
+    el.srcset = img.srcset;
+    el.sizes = '(max-width: 600px) 50vw, 25vw';
+  }
+  el.dataset.full = img.url;
+  el.loading = 'lazy';
+  el.alt = alt;
+  el.addEventListener('load', () => el.classList.add('loaded'));
+  return el;
+}
 
 // Gallery filtering functionality
 function setupGalleryFilters() {
@@ -37,14 +54,7 @@ function filterGallery(category) {
   }
   
   grid.innerHTML = '';
-  filtered.forEach(img => {
-    const el = document.createElement('img');
-    el.src = img.url;
-    el.loading = 'lazy';
-    el.alt = img.uploader || 'fan upload';
-    el.addEventListener('load', () => el.classList.add('loaded'));
-    grid.appendChild(el);
-  });
+  filtered.forEach(img => grid.appendChild(gridImage(img, img.uploader || 'fan upload')));
   
   hookGallery();
 }
@@ -81,14 +91,7 @@ function filterJenna(category) {
   }
   
   grid.innerHTML = '';
-  filtered.forEach(img => {
-    const el = document.createElement('img');
-    el.src = img.url;
-    el.loading = 'lazy';
-    el.alt = img.alt || 'jenna image';
-    el.addEventListener('load', () => el.classList.add('loaded'));
-    grid.appendChild(el);
-  });
+  filtered.forEach(img => grid.appendChild(gridImage(img, img.alt || 'jenna image')));
   
   hookGallery();
 }
@@ -99,7 +102,7 @@ function updateGalleryStats() {
   const todayCount = document.getElementById('todayCount');
   
   if (galleryCount) {
-    galleryCount.textContent = galleryData.length || '—';
+    galleryCount.textContent = galleryTotal || galleryData.length || '—';
   }
   
   if (todayCount) {
@@ -117,7 +120,7 @@ function updateJennaStats() {
   const lastCollect = document.getElementById('lastCollect');
   
   if (jennaCount) {
-    jennaCount.textContent = jennaData.length || '—';
+    jennaCount.textContent = jennaTotal || jennaData.length || '—';
   }
   
   if (lastCollect) {
@@ -136,6 +139,36 @@ const COLOR_PALETTE = [
 ];
 function pickColor(key){ const s = String(key||'').split('').reduce((a,c)=>a + c.charCodeAt(0),0); return COLOR_PALETTE[s % COLOR_PALETTE.length]; }
 
+function renderInviteStats(data){
+  const countSource = document.getElementById('countSource');
+  const lastUpdated = document.getElementById('lastUpdated');
+  const countEl = document.getElementById('memberCount');
+  const onlineEl = document.getElementById('onlineCount');
+  // accept both the invite API shape and the /api/invite guild shape
+  const members = data.approximate_member_count || (data.guild && data.guild.member_count);
+  const online = data.approximate_presence_count || (data.guild && data.guild.presence_count);
+
+  if(countEl) countEl.textContent = members ? `${members.toLocaleString()} members` : '— members';
+  if(onlineEl) onlineEl.textContent = online ? `${online.toLocaleString()} online` : '';
+  if(data.guild && data.guild.name){
+    const serverNameEl = document.getElementById('serverName');
+    if(serverNameEl) serverNameEl.textContent = data.guild.name;
+  }
+
+  if(countSource) countSource.textContent = data && (data.cached || data.stale) ? 'Invite API (cached)' : 'Invite API';
+  if(lastUpdated) lastUpdated.textContent = data && data.fetched_at ? 'Last updated: ' + new Date(data.fetched_at * 1000).toLocaleTimeString() : 'Last updated: ' + new Date().toLocaleTimeString();
+}
+
+// live stats: the server pushes an 'invite' event whenever the stats change
+function subscribeInviteStats(){
+  if(!window.EventSource || !document.getElementById('memberCount')) return false;
+  const stream = new EventSource('/api/stream');
+  stream.addEventListener('invite', (ev)=>{
+    try{ renderInviteStats(JSON.parse(ev.data)); }catch(e){ console.warn('Bad stats event', e); }
+  });
+  return true;
+}
+
 async function fetchInviteStats({manual=false,retries=1}={}){
   const refreshBtn = document.getElementById('refreshCounts');
   const countSource = document.getElementById('countSource');
@@ -150,16 +183,7 @@ async function fetchInviteStats({manual=false,retries=1}={}){
     const res = await fetch('/api/invite');
     if(!res.ok) throw new Error('Failed');
     const data = await res.json();
-
-    if(countEl) countEl.textContent = data.approximate_member_count ? `${data.approximate_member_count.toLocaleString()} members` : '— members';
-    if(onlineEl) onlineEl.textContent = data.approximate_presence_count ? `${data.approximate_presence_count.toLocaleString()} online` : '';
-    if(data.guild && data.guild.name){
-      const serverNameEl = document.getElementById('serverName');
-      if(serverNameEl) serverNameEl.textContent = data.guild.name;
-    }
-
-    if(countSource) countSource.textContent = data && data.cached ? 'Invite API (cached)' : 'Invite API';
-    if(lastUpdated) lastUpdated.textContent = data && data.fetched_at ? 'Last updated: ' + new Date(data.fetched_at * 1000).toLocaleTimeString() : 'Last updated: ' + new Date().toLocaleTimeString();
+    renderInviteStats(data);
     return data;
   }catch(err){
     console.warn('Invite stats unavailable', err);
@@ -233,25 +257,58 @@ function animateNumberText(el, newValue){
   requestAnimationFrame(step);
 }
 
-// lazy load gallery and fade in
+// Image feeds load a page at a time as the end of the grid scrolls into view;
+// each page has its own ETag, so revisits only revalidate
+function loadFeed(grid, path, altFor, onPage, failText){
+  if(grid._feed) grid._feed.stop();
+  const sentinel = document.createElement('div');
+  grid.after(sentinel);
+  let cursor = null, loading = false, done = false;
+  const nearEnd = ()=> sentinel.getBoundingClientRect().top < window.innerHeight + 600;
+
+  async function next(){
+    if(loading || done) return;
+    loading = true;
+    const first = cursor === null;
+    try{
+      const r = await fetch(first ? path : `${path}?cursor=${encodeURIComponent(cursor)}`);
+      if(!r.ok) throw new Error('HTTP ' + r.status);
+      const j = await r.json();
+      if(first) grid.innerHTML = '';
+      j.images.forEach(img=> grid.appendChild(gridImage(img, altFor(img))));
+      onPage(j, first);
+      hookGallery();
+      cursor = j.next_cursor;
+      done = !cursor;
+    }catch(e){
+      if(first) grid.innerHTML = `<div style="color:var(--muted)">${failText}</div>`;
+      done = true;
+    }finally{
+      loading = false;
+    }
+    if(done) stop();
+    else if(nearEnd()) next();
+  }
+  const observer = 'IntersectionObserver' in window
+    ? new IntersectionObserver(entries=>{ if(entries.some(e=>e.isIntersecting)) next(); }, {rootMargin:'600px'})
+    : null;
+  function stop(){ if(observer) observer.disconnect(); sentinel.remove(); }
+  grid._feed = {stop};
+
+  grid.innerHTML = 'Loading...';
+  if(observer) observer.observe(sentinel);
+  return next();
+}
+
 async function loadGallery(){
   const grid = document.querySelector('.gallery-grid');
   if(!grid) return;
-  grid.innerHTML = 'Loading...';
-  try{
-    const r = await fetch('/api/gallery');
-    const j = await r.json();
-    grid.innerHTML = '';
-    j.images.forEach(img=>{
-      const el = document.createElement('img');
-      el.src = img.url;
-      el.loading = 'lazy';
-      el.alt = img.uploader || 'fan upload';
-      el.addEventListener('load', ()=> el.classList.add('loaded'));
-      grid.appendChild(el);
-    });
-    hookGallery();
-  }catch(e){ grid.innerHTML = '<div style="color:var(--muted)">Could not load gallery.</div>'; }
+  return loadFeed(grid, '/api/gallery', img=> img.uploader || 'fan upload', (page, first)=>{
+    if(first) galleryData = [];
+    galleryData.push(...page.images);
+    galleryTotal = page.total;
+    updateGalleryStats();
+  }, 'Could not load gallery.');
 }
 
 function openInviteFromAny(){ document.querySelectorAll('[data-join]').forEach(b=>b.addEventListener('click', recordJoinAndOpen)); }
@@ -260,9 +317,10 @@ function copyInviteFromAny(){ document.querySelectorAll('[data-copy]').forEach(b
 // Gallery loader (de-duplicated) — lazy loader is used above
 
 // Channels: load list from server and render
-async function loadChannels(){
+// fresh: revalidate with the server (after an admin edit) instead of using the browser's copy
+async function loadChannels({fresh=false}={}){
   try{
-    const r = await fetch('/api/channels');
+    const r = await fetch('/api/channels', fresh ? {cache:'no-cache'} : {});
     if(!r.ok) return;
     const j = await r.json();
     const channels = j.channels || [];
@@ -298,7 +356,7 @@ async function loadChannels(){
     if(chList){ chList.innerHTML = ''; channels.forEach(c=>{
       const el = document.createElement('div'); el.style.display='flex'; el.style.alignItems='center'; el.style.gap='12px'; el.style.marginTop='8px';
       el.innerHTML = `<div style='flex:1'><strong>${c.emoji||''} ${c.name}</strong><div style='color:var(--muted)'>${c.url}</div></div>`;
-      const del = document.createElement('button'); del.className='btn secondary'; del.textContent='Delete'; del.addEventListener('click', async ()=>{ await adminAction('/api/admin/channels',{action:'delete',name:c.name}); await loadChannels(); populateAdminChannels(); });
+      const del = document.createElement('button'); del.className='btn secondary'; del.textContent='Delete'; del.addEventListener('click', async ()=>{ await adminAction('/api/admin/channels',{action:'delete',name:c.name}); await loadChannels({fresh:true}); populateAdminChannels(); });
       el.appendChild(del); chList.appendChild(el);
     }); }
 
@@ -306,15 +364,15 @@ async function loadChannels(){
 }
 
 // fetch current site banner/pfp settings and apply
-async function fetchSiteAssets(){
+async function fetchSiteAssets({fresh=false}={}){
   try{
-    const r = await fetch('/api/site');
+    const r = await fetch('/api/site', fresh ? {cache:'no-cache'} : {});
     if(!r.ok) return;
     const s = await r.json();
     // set banner images
-    document.querySelectorAll('.banner img').forEach(img=>{ img.src = s.banner; });
+    if(s.banner) document.querySelectorAll('.banner img').forEach(img=>{ img.src = s.banner; });
     // set header pfp across all pages
-    document.querySelectorAll('.logo.pfp').forEach(img=>{ img.src = s.pfp; });
+    if(s.pfp) document.querySelectorAll('.logo.pfp').forEach(img=>{ img.src = s.pfp; });
   }catch(e){ console.warn('Site assets load failed', e); }
 }
 
@@ -340,17 +398,20 @@ async function setupUpload(){
   });
 }
 
+// Safe to call after every page: images and the lightbox are only wired once
 function hookGallery(){
   const lb = document.getElementById('lightbox');
   const lbImg = lb ? lb.querySelector('.lightbox-img') : null;
-  document.querySelectorAll('.gallery-grid img, .jenna-grid img').forEach(img=>{
+  document.querySelectorAll('.gallery-grid img:not([data-hooked]), .jenna-grid img:not([data-hooked])').forEach(img=>{
+    img.dataset.hooked = '1';
     img.addEventListener('click', ()=>{
       if(!lb || !lbImg) return;
-      lbImg.src = img.src;
+      lbImg.src = img.dataset.full || img.src;
       lb.setAttribute('aria-hidden','false');
     });
   });
-  if(lb){
+  if(lb && !lb.dataset.hooked){
+    lb.dataset.hooked = '1';
     lb.querySelector('.lightbox-close').addEventListener('click', ()=> lb.setAttribute('aria-hidden','true'));
     lb.addEventListener('click', (e)=>{ if(e.target === lb) lb.setAttribute('aria-hidden','true') });
     document.addEventListener('keydown', (e)=>{ if(e.key === 'Escape') lb.setAttribute('aria-hidden','true') });
@@ -360,26 +421,19 @@ function hookGallery(){
 async function loadJenna(){
   const grid = document.querySelector('.jenna-grid');
   if(!grid) return;
-  grid.innerHTML = 'Loading...';
-  try{
-    const r = await fetch('/api/jenna');
-    const j = await r.json();
-    grid.innerHTML = '';
-    j.images.forEach(img=>{
-      const el = document.createElement('img');
-      el.src = img.url;
-      el.loading = 'lazy';
-      el.alt = img.alt || 'jenna image';
-      el.addEventListener('load', ()=> el.classList.add('loaded'));
-      grid.appendChild(el);
-    });
-    hookGallery();
-  }catch(e){ grid.innerHTML = '<div style="color:var(--muted)">Could not load images.</div>'; }
+  return loadFeed(grid, '/api/jenna', img=> img.alt || 'jenna image', (page, first)=>{
+    if(first) jennaData = [];
+    jennaData.push(...page.images);
+    jennaTotal = page.total;
+  }, 'Could not load images.');
 }
 
+const MODERATION_BATCH = 1000;  // ids per batch request; the server's MODERATION_MAX_BATCH
+
 // Admin helpers: need to provide ?token=YOUR_TOKEN as query string or X-Admin-Token header
 async function adminFetch(path, opts={}){
-  return fetch(path + (location.search ? '&' + location.search.slice(1) : '?token=devtoken'), opts);
+  const sep = path.includes('?') ? '&' : '?';
+  return fetch(path + sep + (location.search ? location.search.slice(1) : 'token=devtoken'), opts);
 }
 
 async function loadAdmin(){
@@ -392,66 +446,129 @@ async function loadAdmin(){
     const j = await r.json();
     const pending = j.pending || [];
     const approved = j.approved || [];
-    panel.innerHTML = `<div style="font-weight:700">Pending uploads</div>`;
-    pending.forEach(p=>{
+    const counts = j.counts || {pending: pending.length, approved: approved.length};
+    panel.innerHTML = '';
+    const pendHeader = document.createElement('div'); pendHeader.style.fontWeight='700'; panel.appendChild(pendHeader);
+    const showCounts = ()=>{ pendHeader.textContent = `Pending uploads (${counts.pending})`; approvedCount.textContent = `Approved: ${counts.approved}`; };
+    // bulk actions on the ticked rows
+    const bulk = document.createElement('div'); bulk.style.display='flex'; bulk.style.gap='8px'; bulk.style.alignItems='center'; bulk.style.marginTop='10px';
+    bulk.innerHTML = `<label><input type="checkbox" data-select-all> Select all</label><button class='btn' data-bulk='approve'>Approve selected</button><button class='btn secondary' data-bulk='reject'>Reject selected</button><span style="color:var(--muted)"></span>`;
+    const bulkStatus = bulk.querySelector('span');
+    panel.appendChild(bulk);
+    const pendWrap = document.createElement('div'); panel.appendChild(pendWrap);
+    const pendingRows = new Map();
+    const pendingRow = p=>{
+      if(pendingRows.has(p.id)) return;
       const div = document.createElement('div');
       div.style.display='flex';div.style.gap='12px';div.style.alignItems='center';div.style.marginTop='10px';
-      div.innerHTML = `<img src="/uploads/pending/${p.filename}" style="width:120px;border-radius:8px"><div style="flex:1"><div>${p.uploader}</div><div style="color:var(--muted)">${p.uploaded_at}</div></div>`;
+      div.innerHTML = `<input type="checkbox" data-pick><img src="/uploads/pending/${p.filename}" loading="lazy" style="width:120px;border-radius:8px"><div style="flex:1"><div>${p.uploader}</div><div style="color:var(--muted)">${p.uploaded_at}</div></div>`;
       const approve = document.createElement('button'); approve.className='btn'; approve.textContent='Approve';
       const reject = document.createElement('button'); reject.className='btn secondary'; reject.textContent='Reject';
-      approve.onclick = async ()=>{ await adminAction('/api/admin/approve',{id:p.id}); loadAdmin(); loadChannels(); };
-      reject.onclick = async ()=>{ await adminAction('/api/admin/reject',{id:p.id}); loadAdmin(); };
+      approve.onclick = ()=>moderate([p.id], 'approve');
+      reject.onclick = ()=>moderate([p.id], 'reject');
       div.appendChild(approve); div.appendChild(reject);
-      panel.appendChild(div);
+      pendWrap.appendChild(div);
+      pendingRows.set(p.id, {row: div, upload: p});
+    };
+    // Send ids in batches and update the lists from each response, without reloading them
+    const moderate = async (ids, action)=>{
+      let done = 0, failed = 0;
+      for(let i = 0; i < ids.length; i += MODERATION_BATCH){
+        bulkStatus.textContent = ids.length > 1 ? `${action === 'approve' ? 'Approving' : 'Rejecting'}... ${i}/${ids.length}` : '';
+        const res = await adminAction(`/api/admin/${action}_batch`, {ids: ids.slice(i, i + MODERATION_BATCH)});
+        if(!res || !res.results){ failed += Math.min(MODERATION_BATCH, ids.length - i); continue; }
+        Object.entries(res.results).forEach(([id, result])=>{
+          const entry = pendingRows.get(id);
+          if(result === 'error' || result === 'invalid'){ failed++; return; }
+          if(!entry) return;
+          entry.row.remove(); pendingRows.delete(id); counts.pending--;
+          if(result === 'approved'){ aprWrap.prepend(approvedTile(entry.upload)); counts.approved++; }
+          if(result !== 'not_found') done++;
+        });
+        showCounts();
+      }
+      bulkStatus.textContent = ids.length > 1 || failed ? `${done} ${action === 'approve' ? 'approved' : 'rejected'}${failed ? `, ${failed} failed` : ''}` : '';
+      if(done && action === 'approve') loadChannels();
+    };
+    bulk.querySelector('[data-select-all]').addEventListener('change', e=>{
+      pendWrap.querySelectorAll('[data-pick]').forEach(c=>{ c.checked = e.target.checked; });
+    });
+    bulk.querySelectorAll('[data-bulk]').forEach(b=>{
+      b.addEventListener('click', async ()=>{
+        const ids = [...pendingRows].filter(([, entry])=>entry.row.querySelector('[data-pick]').checked).map(([id])=>id);
+        if(!ids.length) return;
+        bulk.querySelectorAll('button').forEach(x=>{ x.disabled = true; });
+        await moderate(ids, b.getAttribute('data-bulk'));
+        bulk.querySelectorAll('button').forEach(x=>{ x.disabled = false; });
+        bulk.querySelector('[data-select-all]').checked = false;
+      });
     });
+    pending.forEach(pendingRow);
+    // page through the rest of the queue on demand
+    let pendingCursor = j.next_cursor ? j.next_cursor.pending : null;
+    if(pendingCursor){
+      const more = document.createElement('button'); more.className='btn secondary'; more.textContent='Load more'; more.style.marginTop='10px';
+      more.onclick = async ()=>{
+        const res = await adminFetch('/api/admin/uploads?status=pending&cursor=' + encodeURIComponent(pendingCursor));
+        if(!res.ok) return;
+        const page = await res.json();
+        page.items.forEach(pendingRow);
+        pendingCursor = page.next_cursor;
+        if(!pendingCursor) more.remove();
+      };
+      panel.appendChild(more);
+    }
     panel.appendChild(document.createElement('hr'));
 
     // Approved images — allow admin to set as site banner or pfp
     const approvedHeader = document.createElement('div'); approvedHeader.style.fontWeight='700'; approvedHeader.textContent='Approved images (click to set)'; panel.appendChild(approvedHeader);
     const aprWrap = document.createElement('div'); aprWrap.style.display='flex'; aprWrap.style.flexWrap='wrap'; aprWrap.style.gap='12px'; aprWrap.style.marginTop='10px';
-    approved.forEach(p=>{
+    const approvedTile = p=>{
       const d = document.createElement('div'); d.style.width='160px'; d.style.border='1px solid rgba(11,18,32,0.03)'; d.style.borderRadius='8px'; d.style.padding='8px'; d.style.background='white';
-      d.innerHTML = `<img src="/uploads/approved/${p.filename}" style="width:100%;height:90px;object-fit:cover;border-radius:6px"><div style="display:flex;gap:8px;margin-top:8px"><button class='btn' data-set='banner' data-file='${p.filename}'>Set Banner</button><button class='btn secondary' data-set='pfp' data-file='${p.filename}'>Set PFP</button><button class='btn' data-jenna='${p.filename}'>Add to Jenna</button></div>`;
-      aprWrap.appendChild(d);
-    });
+      d.innerHTML = `<img src="/uploads/approved/${p.filename}" loading="lazy" style="width:100%;height:90px;object-fit:cover;border-radius:6px"><div style="display:flex;gap:8px;margin-top:8px"><button class='btn' data-set='banner' data-file='${p.filename}'>Set Banner</button><button class='btn secondary' data-set='pfp' data-file='${p.filename}'>Set PFP</button><button class='btn' data-jenna='${p.filename}'>Add to Jenna</button></div>`;
+      return d;
+    };
+    approved.forEach(p=>aprWrap.appendChild(approvedTile(p)));
     panel.appendChild(aprWrap);
     panel.appendChild(document.createElement('hr'));
-    panel.appendChild(document.createTextNode(`Approved: ${approved.length}`));
-
-    // wire up set buttons
-    panel.querySelectorAll('[data-set]').forEach(b=>{
-      b.addEventListener('click', async ()=>{
+    const approvedCount = document.createElement('span'); panel.appendChild(approvedCount);
+    showCounts();
+
+    // wire up set and Add to Jenna buttons, including tiles added by approvals
+    aprWrap.addEventListener('click', async e=>{
+      const b = e.target.closest('[data-set], [data-jenna]');
+      if(!b) return;
+      if(b.hasAttribute('data-set')){
         const type = b.getAttribute('data-set');
         const file = b.getAttribute('data-file');
         const url = `/uploads/approved/${file}`;
         await adminAction('/api/admin/set_asset',{type, url});
         // refresh assets on page
-        await fetchSiteAssets();
+        await fetchSiteAssets({fresh:true});
         alert('Updated site ' + type);
-      });
-    });
-
-  // wire up Add to Jenna buttons
-    panel.querySelectorAll('[data-jenna]').forEach(b=>{
-      b.addEventListener('click', async ()=>{
-        const fname = b.getAttribute('data-jenna');
-        const res = await adminAction('/api/admin/add_jenna',{filename: fname});
-        if(res && res.url){ alert('Added to Jenna page'); } else { alert('Failed to add'); }
-      });
+        return;
+      }
+      const fname = b.getAttribute('data-jenna');
+      const res = await adminAction('/api/admin/add_jenna',{filename: fname});
+      if(res && res.url){
+        alert(res.message || 'Added to Jenna page');
+        if(document.querySelector('.jenna-grid')) loadJenna();
+      } else { alert((res && res.error) || 'Failed to add'); }
     });
 
     // wire up Collect Images button
     const collectBtn = document.getElementById('collectImagesBtn');
     const collectStatus = document.getElementById('collectStatus');
-    if(collectBtn && collectStatus){
+    if(collectBtn && collectStatus && !collectBtn.dataset.wired){
+      collectBtn.dataset.wired = '1';
       collectBtn.addEventListener('click', async ()=>{
         collectBtn.disabled = true;
         collectBtn.textContent = 'Collecting...';
         collectStatus.textContent = 'Collecting images...';
         try{
-          const res = await adminAction('/api/admin/collect_jenna_images', {});
-          if(res && res.status === 'ok'){
-            collectStatus.textContent = 'Images collected successfully!';
+          const res = await runAdminJob('/api/admin/collect_jenna_images', {}, job=>{ collectStatus.textContent = jobProgressText(job); });
+          if(res && res.status === 'done'){
+            collectStatus.textContent = res.message || 'Images collected successfully!';
             // reload jenna images if on that page
             if(document.querySelector('.jenna-grid')) loadJenna();
           } else {
@@ -478,6 +595,25 @@ async function adminAction(path, body){
   }catch(e){ return {error:'failed'} }
 }
 
+// Start a background admin job and poll it until it finishes; onProgress gets the job while it runs
+async function runAdminJob(path, body, onProgress){
+  const started = await adminAction(path, body);
+  if(!started || !started.job_id) return started;
+  while(true){
+    await new Promise(r=>setTimeout(r, 1000));
+    let job;
+    try{ job = await (await adminFetch(started.url)).json(); }catch(e){ continue; }
+    if(job.error && !job.status) return job;
+    if(job.finished_at) return job;
+    if(onProgress) onProgress(job);
+  }
+}
+
+function jobProgressText(job){
+  const p = job.progress;
+  return p && p.total ? `Collecting images... ${p.done}/${p.total}` : 'Collecting images...';
+}
+
 function setActiveNav(){
   const path = location.pathname.split('/').pop() || 'index.html';
   document.querySelectorAll('.nav a').forEach(a=>{
@@ -492,7 +628,7 @@ async function populateAdminChannels(){
   const list = document.getElementById('channelList');
   list.innerHTML = 'Loading...';
   try{
-    const r = await adminFetch('/api/channels');
+    const r = await adminFetch('/api/channels', {cache:'no-cache'});
     if(!r.ok){ list.innerHTML = 'Unauthorized or error'; return; }
     const j = await r.json();
     const channels = j.channels || [];
@@ -500,10 +636,13 @@ async function populateAdminChannels(){
     channels.forEach(c=>{
       const el = document.createElement('div'); el.style.display='flex'; el.style.alignItems='center'; el.style.gap='12px'; el.style.marginTop='8px';
       el.innerHTML = `<div style='flex:1'><strong>${c.emoji||''} ${c.name}</strong><div style='color:var(--muted)'>${c.url}</div></div>`;
-      const del = document.createElement('button'); del.className='btn secondary'; del.textContent='Delete'; del.addEventListener('click', async ()=>{ await adminAction('/api/admin/channels',{action:'delete',name:c.name}); await populateAdminChannels(); loadChannels(); });
+      const del = document.createElement('button'); del.className='btn secondary'; del.textContent='Delete'; del.addEventListener('click', async ()=>{ await adminAction('/api/admin/channels',{action:'delete',name:c.name}); await populateAdminChannels(); loadChannels({fresh:true}); });
       el.appendChild(del); list.appendChild(el);
     });
 
+    // this runs again after every edit; the form only needs one handler
+    if(addForm.dataset.wired) return;
+    addForm.dataset.wired = '1';
     addForm.addEventListener('submit', async (ev)=>{
       ev.preventDefault();
       const data = new FormData(addForm);
@@ -513,7 +652,7 @@ async function populateAdminChannels(){
       await adminAction('/api/admin/channels',{action:'add', channel:{emoji,name,url}});
       addForm.reset();
       await populateAdminChannels();
-      await loadChannels();
+      await loadChannels({fresh:true});
     });
   }catch(e){ list.innerHTML='Failed to load'; }
 }
@@ -550,9 +689,9 @@ function setup(){
       collectBtn.textContent = 'Collecting...';
       collectStatus.textContent = 'Collecting images...';
       try{
-        const res = await adminAction('/api/admin/collect', {});
-        if(res && res.status === 'ok'){
-          collectStatus.textContent = 'Images collected successfully!';
+        const res = await runAdminJob('/api/admin/collect_jenna_images', {}, job=>{ collectStatus.textContent = jobProgressText(job); });
+        if(res && res.status === 'done'){
+          collectStatus.textContent = res.message || 'Images collected successfully!';
           // reload jenna images
           loadJenna();
           updateJennaStats();
@@ -567,11 +706,12 @@ function setup(){
     });
   }
 
-  // initial fetch
-  fetchInviteStats();
+  // initial fetch, then live updates (or polling every minute without EventSource)
   fetchSiteAssets();
-  // periodic refresh (every minute)
-  setInterval(()=>fetchInviteStats(),60000);
+  if(!subscribeInviteStats()){
+    fetchInviteStats();
+    setInterval(()=>fetchInviteStats(),60000);
+  }
   
   // Update stats periodically
   setInterval(() => {